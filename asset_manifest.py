@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Asset Manifest
+Naming rules for content-hashed asset copies and the asset-manifest.json recording
+them, shared by the fingerprinting pass, the service worker generator and the server
+"""
+
+import json
+import os
+import posixpath
+import re
+
+MANIFEST_FILE = 'asset-manifest.json'
+HASH_LENGTH = 8
+# Compressed copies older serve_site.py --precompress runs left next to files are not assets
+PRECOMPRESSED_SUFFIXES = ('.br', '.gz')
+
+FINGERPRINTED_NAME = re.compile(r'^(?P<stem>.+)\.(?P<hash>[0-9a-f]{%d})(?P<ext>\.[^./]+)$' % HASH_LENGTH)
+
+def strip_precompressed(path):
+    """modern.1a2b3c4d.css.gz -> modern.1a2b3c4d.css"""
+    for suffix in PRECOMPRESSED_SUFFIXES:
+        if path.endswith(suffix):
+            return path[:-len(suffix)]
+    return path
+
+def original_path(path):
+    """Map a fingerprinted path back to its source name, or None if it is not one"""
+    directory, name = posixpath.split(path)
+    match = FINGERPRINTED_NAME.match(name)
+    if not match:
+        return None
+    return posixpath.join(directory, match.group('stem') + match.group('ext'))
+
+def load_manifest(root):
+    """{source path: {'path', 'sha256', 'size'}} from asset-manifest.json, or {} before fingerprinting"""
+    try:
+        with open(os.path.join(root, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
@@ -40,6 +40,13 @@
   } else {
     includeHeader();
   }
+
+  // Offline/precache support; sw.js is generated by build_site.py
+  if ('serviceWorker' in navigator) {
+    window.addEventListener('load', function () {
+      navigator.serviceWorker.register('/sw.js').catch(function () {});
+    });
+  }
 })();
 
 
@@ -0,0 +1,199 @@
+// Similar-passage search over the int8 index written by passage_index.py
+// Usage in HTML: <form data-passage-search><input type="search" name="q"><ol data-results></ol></form>
+// or from script: SimilarPassages.search('query text').then(function (hits) { ... })
+(function () {
+  var INDEX_URL = '/search/passages.bin';
+  var META_URL = '/search/passages.json';
+  var loading = null;
+
+  // CRC-32, as zlib.crc32 computes it, over the UTF-8 bytes of each feature
+  var CRC_TABLE = (function () {
+    var table = new Uint32Array(256);
+    for (var n = 0; n < 256; n++) {
+      var c = n;
+      for (var k = 0; k < 8; k++) c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1;
+      table[n] = c >>> 0;
+    }
+    return table;
+  })();
+  var encoder = new TextEncoder();
+
+  function crc32(text) {
+    var bytes = encoder.encode(text);
+    var crc = 0xffffffff;
+    for (var i = 0; i < bytes.length; i++) crc = CRC_TABLE[(crc ^ bytes[i]) & 0xff] ^ (crc >>> 8);
+    return (crc ^ 0xffffffff) >>> 0;
+  }
+
+  function fetchOk(url) {
+    return fetch(url).then(function (response) {
+      if (!response.ok) throw new Error('could not load ' + url);
+      return response;
+    });
+  }
+
+  function parse(buffer, meta) {
+    var view = new DataView(buffer);
+    var magic = String.fromCharCode(view.getUint8(0), view.getUint8(1), view.getUint8(2), view.getUint8(3));
+    if (magic !== 'PSG1') throw new Error('unexpected passage index format');
+    var index = {
+      count: view.getUint32(4, true),
+      dims: view.getUint32(8, true),
+      buckets: view.getUint32(12, true),
+      idfScale: view.getFloat32(16, true),
+      vectorScale: view.getFloat32(20, true),
+      meta: meta,
+      stop: {}
+    };
+    var offset = 24;
+    index.componentScales = new Float32Array(index.dims);
+    for (var k = 0; k < index.dims; k++) index.componentScales[k] = view.getFloat32(offset + 4 * k, true);
+    offset += 4 * index.dims;
+    index.idf = new Uint8Array(buffer, offset, index.buckets);
+    offset += index.buckets;
+    index.components = new Int8Array(buffer, offset, index.dims * index.buckets);
+    offset += index.dims * index.buckets;
+    index.vectors = new Int8Array(buffer, offset, index.count * index.dims);
+    meta.stop_words.forEach(function (word) { index.stop[word] = true; });
+    return index;
+  }
+
+  // Fetched on first use only, so pages that never search pay nothing
+  function load() {
+    if (!loading) {
+      loading = Promise.all([
+        fetchOk(INDEX_URL).then(function (response) { return response.arrayBuffer(); }),
+        fetchOk(META_URL).then(function (response) { return response.json(); })
+      ]).then(function (results) {
+        return parse(results[0], results[1]);
+      }).catch(function (error) {
+        loading = null;
+        throw error;
+      });
+    }
+    return loading;
+  }
+
+  // Same features as passage_index.passage_features: words, word bigrams, character trigrams
+  function features(text, stop) {
+    var words = (text.toLowerCase().match(/[a-z0-9]+/g) || []).filter(function (word) { return !stop[word]; });
+    var result = [];
+    var i;
+    for (i = 0; i < words.length; i++) result.push('w:' + words[i]);
+    for (i = 0; i + 1 < words.length; i++) result.push('b:' + words[i] + ' ' + words[i + 1]);
+    words.forEach(function (word) {
+      var padded = '^' + word + '$';
+      for (var j = 0; j + 3 <= padded.length; j++) result.push('c:' + padded.slice(j, j + 3));
+    });
+    return result;
+  }
+
+  function embed(index, text) {
+    var counts = {};
+    features(text, index.stop).forEach(function (feature) {
+      var bucket = crc32(feature) & (index.buckets - 1);
+      counts[bucket] = (counts[bucket] || 0) + 1;
+    });
+    var query = new Float32Array(index.dims);
+    Object.keys(counts).forEach(function (key) {
+      var bucket = +key;
+      var weight = Math.log1p(counts[key]) * index.idf[bucket] * index.idfScale;
+      if (!weight) return;
+      for (var k = 0; k < index.dims; k++) {
+        query[k] += weight * index.components[k * index.buckets + bucket] * index.componentScales[k];
+      }
+    });
+    var norm = 0;
+    for (var k = 0; k < index.dims; k++) norm += query[k] * query[k];
+    if (!norm) return null;
+    norm = Math.sqrt(norm);
+    for (k = 0; k < index.dims; k++) query[k] /= norm;
+    return query;
+  }
+
+  function describe(index, i, score) {
+    var passage = index.meta.passages[i];
+    var page = index.meta.pages[passage[0]];
+    return {
+      index: i,
+      score: score * index.vectorScale,
+      url: page.url + (passage[1] ? '#' + passage[1] : ''),
+      title: page.title,
+      text: passage[2]
+    };
+  }
+
+  // Brute force: one int8 dot product per passage, keeping a small sorted top-k
+  function rank(index, query, k, skip) {
+    var dims = index.dims;
+    var vectors = index.vectors;
+    var top = [];
+    for (var i = 0; i < index.count; i++) {
+      if (i === skip) continue;
+      var score = 0;
+      var base = i * dims;
+      for (var d = 0; d < dims; d++) score += query[d] * vectors[base + d];
+      if (top.length === k && score <= top[k - 1].score) continue;
+      var position = top.length;
+      while (position > 0 && top[position - 1].score < score) position--;
+      top.splice(position, 0, { index: i, score: score });
+      if (top.length > k) top.pop();
+    }
+    return top.map(function (hit) { return describe(index, hit.index, hit.score); });
+  }
+
+  window.SimilarPassages = {
+    search: function (text, k) {
+      return load().then(function (index) {
+        var query = embed(index, text);
+        return query ? rank(index, query, k || 10, -1) : [];
+      });
+    },
+    similarTo: function (passage, k) {
+      return load().then(function (index) {
+        var query = new Float32Array(index.dims);
+        for (var d = 0; d < index.dims; d++) query[d] = index.vectors[passage * index.dims + d] * index.vectorScale;
+        return rank(index, query, k || 5, passage);
+      });
+    }
+  };
+
+  function attach(form) {
+    var input = form.querySelector('input[name="q"]');
+    var results = form.querySelector('[data-results]');
+    if (!input || !results) return;
+    // Start downloading the index as soon as the reader shows intent to search
+    input.addEventListener('focus', function () { load().catch(function () {}); });
+    form.addEventListener('submit', function (event) {
+      event.preventDefault();
+      window.SimilarPassages.search(input.value, 10).then(function (hits) {
+        results.innerHTML = '';
+        hits.forEach(function (hit) {
+          var item = document.createElement('li');
+          var link = document.createElement('a');
+          link.href = hit.url;
+          link.textContent = hit.title;
+          var text = document.createElement('span');
+          text.textContent = hit.text;
+          item.appendChild(link);
+          item.appendChild(document.createElement('br'));
+          item.appendChild(text);
+          results.appendChild(item);
+        });
+        if (!hits.length) results.innerHTML = '<li>No similar passages found</li>';
+      }).catch(function () {
+        results.innerHTML = '<li>Search is unavailable right now</li>';
+      });
+    });
+  }
+
+  function init() {
+    Array.prototype.forEach.call(document.querySelectorAll('[data-passage-search]'), attach);
+  }
+
+  if (document.readyState === 'loading') {
+    document.addEventListener('DOMContentLoaded', init);
+  } else {
+    init();
+  }
+})();
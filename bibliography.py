@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Paper Bibliography Database
+Persists the paper records extract_paper_info finds in each note into a local SQLite
+database and generates per-paper and per-author listing pages plus BibTeX exports
+"""
+
+import os
+import re
+import sqlite3
+import sys
+
+import md_to_html_converter as converter
+
+DATABASE = os.path.join('.build', 'bibliography.sqlite')
+PAPERS_DIR = 'papers'
+AUTHORS_DIR = os.path.join(PAPERS_DIR, 'authors')
+BIBTEX_FILE = os.path.join(PAPERS_DIR, 'bibliography.bib')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS papers (
+    id INTEGER PRIMARY KEY,
+    paper_key TEXT NOT NULL UNIQUE,
+    slug TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    url TEXT,
+    doi TEXT,
+    authors TEXT,
+    journal TEXT,
+    published TEXT,
+    year INTEGER
+);
+CREATE TABLE IF NOT EXISTS paper_authors (
+    paper_id INTEGER NOT NULL REFERENCES papers(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    author TEXT NOT NULL,
+    author_slug TEXT NOT NULL,
+    PRIMARY KEY (paper_id, position)
+);
+CREATE TABLE IF NOT EXISTS citations (
+    paper_id INTEGER NOT NULL REFERENCES papers(id) ON DELETE CASCADE,
+    note_stem TEXT NOT NULL,
+    PRIMARY KEY (paper_id, note_stem)
+);
+CREATE TABLE IF NOT EXISTS notes (
+    stem TEXT PRIMARY KEY,
+    source_hash TEXT NOT NULL,
+    title TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_papers_doi ON papers(doi);
+CREATE INDEX IF NOT EXISTS idx_papers_year ON papers(year);
+CREATE INDEX IF NOT EXISTS idx_paper_authors_slug ON paper_authors(author_slug);
+CREATE INDEX IF NOT EXISTS idx_citations_note ON citations(note_stem);
+"""
+
+def slugify(text):
+    """Lowercase, hyphen-separated slug safe for file names"""
+    return re.sub(r'[^a-z0-9]+', '-', text.lower()).strip('-') or 'untitled'
+
+def split_authors(authors):
+    """Split an author line into names, dropping 'et al.' and trailing <br> markup"""
+    authors = re.sub(r'<br\s*/?>', '', authors)
+    authors = re.sub(r'\bet\s+al\.?', '', authors)
+    names = re.split(r',|;|\band\b|&', authors)
+    return [name.strip() for name in names if name.strip()]
+
+def paper_record(paper_info):
+    """Normalize an extract_paper_info result into a database record, or None"""
+    title = converter.clean_field(paper_info.get('title'))
+    if not title:
+        return None
+    doi = converter.normalize_doi(converter.clean_field(paper_info.get('doi')))
+    published = converter.clean_field(paper_info.get('published'))
+    year_match = re.search(r'\b(19|20)\d{2}\b', published)
+    return {
+        # Deduplicate on DOI when there is one, otherwise on the normalized title
+        'paper_key': f'doi:{doi}' if doi else f'title:{slugify(title)}',
+        'title': title,
+        'url': converter.clean_field(paper_info.get('url')),
+        'doi': doi,
+        'authors': split_authors(converter.clean_field(paper_info.get('authors'))),
+        'journal': converter.clean_field(paper_info.get('journal')),
+        'published': published,
+        'year': int(year_match.group(0)) if year_match else None,
+    }
+
+def open_database(root, dry_run=False):
+    """Open (creating if needed) the bibliography database
+
+    A dry run gets an in-memory copy of it, so syncing leaves the file untouched.
+    """
+    path = os.path.join(root, DATABASE)
+    if dry_run:
+        conn = sqlite3.connect(':memory:')
+        if os.path.exists(path):
+            disk = sqlite3.connect(f'file:{path}?mode=ro', uri=True)
+            disk.backup(conn)
+            disk.close()
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA foreign_keys = ON')
+    conn.executescript(SCHEMA)
+    return conn
+
+def upsert_paper(conn, record):
+    """Insert a paper or update it from the latest source, keeping fields that source leaves blank; returns its id
+
+    The slug is kept so a corrected title does not move the paper's page.
+    """
+    row = conn.execute('SELECT id FROM papers WHERE paper_key = ?', (record['paper_key'],)).fetchone()
+    if row:
+        conn.execute("""
+            UPDATE papers SET
+                title = COALESCE(NULLIF(?, ''), title),
+                url = COALESCE(NULLIF(?, ''), url),
+                authors = COALESCE(NULLIF(?, ''), authors),
+                journal = COALESCE(NULLIF(?, ''), journal),
+                published = COALESCE(NULLIF(?, ''), published),
+                year = COALESCE(?, year)
+            WHERE id = ?""",
+            (record['title'], record['url'], ', '.join(record['authors']), record['journal'],
+             record['published'], record['year'], row['id']))
+        if record['authors']:
+            conn.execute('DELETE FROM paper_authors WHERE paper_id = ?', (row['id'],))
+            insert_paper_authors(conn, row['id'], record['authors'])
+        return row['id']
+
+    slug = slugify(record['title'])
+    if conn.execute('SELECT 1 FROM papers WHERE slug = ?', (slug,)).fetchone():
+        slug = f"{slug}-{slugify(record['paper_key'])[-8:]}"
+    cursor = conn.execute("""
+        INSERT INTO papers (paper_key, slug, title, url, doi, authors, journal, published, year)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+        (record['paper_key'], slug, record['title'], record['url'], record['doi'],
+         ', '.join(record['authors']), record['journal'], record['published'], record['year']))
+    insert_paper_authors(conn, cursor.lastrowid, record['authors'])
+    return cursor.lastrowid
+
+def insert_paper_authors(conn, paper_id, authors):
+    conn.executemany(
+        'INSERT INTO paper_authors (paper_id, position, author, author_slug) VALUES (?, ?, ?, ?)',
+        [(paper_id, position, name, slugify(name)) for position, name in enumerate(authors)])
+
+def sync_bibliography(conn, notes, doc_hashes):
+    """Re-parse only the notes whose source changed and drop papers no note cites anymore"""
+    known = {row['stem']: row for row in conn.execute('SELECT stem, source_hash, title FROM notes')}
+    with conn:
+        for stem in set(known) - set(notes):
+            conn.execute('DELETE FROM citations WHERE note_stem = ?', (stem,))
+            conn.execute('DELETE FROM notes WHERE stem = ?', (stem,))
+
+        for stem, note in notes.items():
+            previous = known.get(stem)
+            if previous and previous['source_hash'] == doc_hashes[stem] and previous['title'] == note['title']:
+                continue
+            conn.execute('DELETE FROM citations WHERE note_stem = ?', (stem,))
+            record = paper_record(converter.extract_paper_info(note['markdown']))
+            if record:
+                paper_id = upsert_paper(conn, record)
+                conn.execute('INSERT OR IGNORE INTO citations (paper_id, note_stem) VALUES (?, ?)', (paper_id, stem))
+            conn.execute('INSERT OR REPLACE INTO notes (stem, source_hash, title) VALUES (?, ?, ?)',
+                         (stem, doc_hashes[stem], note['title']))
+
+        conn.execute('DELETE FROM papers WHERE id NOT IN (SELECT paper_id FROM citations)')
+
+def notes_citing(conn, paper_key):
+    """All notes citing a paper, via the citations index"""
+    return conn.execute("""
+        SELECT notes.stem, notes.title FROM citations
+        JOIN papers ON papers.id = citations.paper_id
+        JOIN notes ON notes.stem = citations.note_stem
+        WHERE papers.paper_key = ? ORDER BY notes.title""", (paper_key,)).fetchall()
+
+def papers_by_author(conn, author_slug):
+    """All papers by one author, via the author index"""
+    return conn.execute("""
+        SELECT papers.* FROM paper_authors
+        JOIN papers ON papers.id = paper_authors.paper_id
+        WHERE paper_authors.author_slug = ? ORDER BY papers.year DESC, papers.title""", (author_slug,)).fetchall()
+
+def paper_by_doi(conn, doi):
+    """Look up a paper by DOI, accepting any resolver prefix"""
+    return conn.execute('SELECT * FROM papers WHERE doi = ?', (converter.normalize_doi(doi),)).fetchone()
+
+def paper_keys(conn):
+    """Keys of every paper currently cited by at least one note"""
+    return [row['paper_key'] for row in conn.execute('SELECT paper_key FROM papers ORDER BY paper_key')]
+
+def bibliography_outputs(conn):
+    """Describe every page the bibliography produces with the paper keys it depends on"""
+    outputs = []
+    for paper in conn.execute('SELECT paper_key, slug FROM papers ORDER BY slug'):
+        outputs.append({'kind': 'paper', 'key': paper['paper_key'],
+                        'path': os.path.join(PAPERS_DIR, paper['slug'] + '.html'),
+                        'papers': [paper['paper_key']]})
+    for author in conn.execute('SELECT DISTINCT author_slug FROM paper_authors ORDER BY author_slug'):
+        keys = [paper['paper_key'] for paper in papers_by_author(conn, author['author_slug'])]
+        outputs.append({'kind': 'author', 'key': author['author_slug'],
+                        'path': os.path.join(AUTHORS_DIR, author['author_slug'] + '.html'),
+                        'papers': keys})
+    outputs.append({'kind': 'bibtex', 'path': BIBTEX_FILE, 'papers': paper_keys(conn)})
+    return outputs
+
+def paper_fingerprint(conn, paper_key):
+    """Everything a paper's pages show: its record plus the titles of citing notes"""
+    paper = conn.execute('SELECT * FROM papers WHERE paper_key = ?', (paper_key,)).fetchone()
+    citing = notes_citing(conn, paper_key)
+    return repr((tuple(paper), [tuple(note) for note in citing]))
+
+def bibtex_key(paper):
+    """Citation key such as billard2025roadmap"""
+    first_author = paper['authors'].split(',')[0].split() if paper['authors'] else ['anon']
+    title_words = [word for word in re.findall(r'[a-z]+', paper['title'].lower()) if len(word) > 3]
+    return f"{slugify(first_author[-1]).replace('-', '')}{paper['year'] or ''}{title_words[0] if title_words else ''}"
+
+def generate_bibtex_entry(paper):
+    """Render one paper as a BibTeX @article entry"""
+    fields = [
+        ('title', f"{{{paper['title']}}}"),
+        ('author', ' and '.join(paper['authors'].split(', ')) if paper['authors'] else ''),
+        ('journal', paper['journal']),
+        ('year', str(paper['year'] or '')),
+        ('doi', paper['doi']),
+        ('url', paper['url']),
+    ]
+    body = ',\n'.join(f'  {name} = {{{value}}}' for name, value in fields if value)
+    return f"@article{{{bibtex_key(paper)},\n{body}\n}}\n"
+
+def generate_bibtex(conn):
+    """Render the whole bibliography as one .bib file"""
+    papers = conn.execute('SELECT * FROM papers ORDER BY year DESC, title').fetchall()
+    return '\n'.join(generate_bibtex_entry(paper) for paper in papers)
+
+def page_shell(title, body, author="Siyang Liu", domain="https://lsy641.github.io"):
+    """Wrap bibliography content in the same document shell as the notes"""
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>{title} | {author}</title>
+    <meta name="author" content="{author}" />
+    <link rel="up" href="{domain}/notes/" />
+    {converter.generate_css()}
+</head>
+<body>
+    <!-- Breadcrumb Navigation -->
+    <nav class="breadcrumb" aria-label="Breadcrumb">
+        <a href="{domain}/">Home</a> &gt;
+        <a href="{domain}/research-notes">Research Notes</a> &gt;
+        <a href="{domain}/notes/">Reading Notes</a> &gt;
+        Papers
+    </nav>
+
+    <article>
+{body}
+    </article>
+</body>
+</html>"""
+
+def generate_paper_page(conn, paper_key, author="Siyang Liu", domain="https://lsy641.github.io"):
+    """Per-paper page: metadata, the notes citing it and its BibTeX entry"""
+    paper = conn.execute('SELECT * FROM papers WHERE paper_key = ?', (paper_key,)).fetchone()
+    authors = conn.execute(
+        'SELECT author, author_slug FROM paper_authors WHERE paper_id = ? ORDER BY position', (paper['id'],)).fetchall()
+    author_links = ', '.join(f'<a href="{domain}/papers/authors/{row["author_slug"]}">{row["author"]}</a>'
+                             for row in authors)
+    citing = '\n'.join(f'            <li><a href="{domain}/notes/{note["stem"]}">{note["title"]}</a></li>'
+                       for note in notes_citing(conn, paper_key))
+    body = f"""        <h2>{paper['title']}</h2>
+        <div class="paper-meta">
+            {f'<strong>Paper:</strong> <a href="{paper["url"]}" rel="noopener" target="_blank">{paper["url"]}</a><br>' if paper['url'] else ''}
+            {f'<strong>Authors:</strong> {author_links}<br>' if author_links else ''}
+            {f'<strong>Journal:</strong> {paper["journal"]}<br>' if paper['journal'] else ''}
+            {f'<strong>Published:</strong> {paper["published"]}<br>' if paper['published'] else ''}
+            {f'<strong>DOI:</strong> <a href="https://doi.org/{paper["doi"]}" rel="noopener" target="_blank">{paper["doi"]}</a><br>' if paper['doi'] else ''}
+        </div>
+        <h3>Notes citing this paper</h3>
+        <ul>
+{citing}
+        </ul>
+        <h3>BibTeX</h3>
+        <pre><code>{generate_bibtex_entry(paper)}</code></pre>"""
+    return page_shell(paper['title'], body, author, domain)
+
+def generate_author_page(conn, author_slug, author="Siyang Liu", domain="https://lsy641.github.io"):
+    """Per-author page listing every paper of theirs cited in the notes"""
+    name = conn.execute('SELECT author FROM paper_authors WHERE author_slug = ? LIMIT 1', (author_slug,)).fetchone()['author']
+    items = '\n'.join(
+        f'            <li><a href="{domain}/papers/{paper["slug"]}">{paper["title"]}</a>'
+        f'{f" ({paper["year"]})" if paper["year"] else ""}</li>'
+        for paper in papers_by_author(conn, author_slug))
+    body = f"""        <h2>Papers by {name}</h2>
+        <ul>
+{items}
+        </ul>"""
+    return page_shell(f'Papers by {name}', body, author, domain)
+
+def render_output(root, output, author="Siyang Liu", domain="https://lsy641.github.io"):
+    """Render one bibliography output; opens its own connection so it can run in a worker"""
+    conn = open_database(root)
+    try:
+        if output['kind'] == 'paper':
+            return generate_paper_page(conn, output['key'], author, domain)
+        if output['kind'] == 'author':
+            return generate_author_page(conn, output['key'], author, domain)
+        return generate_bibtex(conn)
+    finally:
+        conn.close()
+
+def main():
+    """Query the bibliography database from the command line"""
+    if len(sys.argv) < 3 or sys.argv[1] not in ('doi', 'author', 'citing'):
+        print("Usage: python bibliography.py doi <doi> | author <name> | citing <doi-or-title>")
+        print("Example: python bibliography.py citing 10.1038/s42256-025-01050-6")
+        return
+
+    conn = open_database('.')
+    query, value = sys.argv[1], ' '.join(sys.argv[2:])
+    if query == 'doi':
+        paper = paper_by_doi(conn, value)
+        print(generate_bibtex_entry(paper) if paper else f"No paper with DOI '{value}'")
+    elif query == 'author':
+        for paper in papers_by_author(conn, slugify(value)):
+            print(f"{paper['year'] or '----'}  {paper['title']}")
+    else:
+        paper = paper_by_doi(conn, value) or conn.execute(
+            'SELECT * FROM papers WHERE slug = ?', (slugify(value),)).fetchone()
+        if paper is None:
+            print(f"No paper matching '{value}'")
+            return
+        for note in notes_citing(conn, paper['paper_key']):
+            print(f"{note['stem']}: {note['title']}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,527 @@
+#!/usr/bin/env python3
+"""
+Incremental Site Builder
+Builds every markdown note with md_to_html_converter and records a dependency graph
+of sources, templates, partials, assets and cross-note links so an edit only rebuilds
+the pages that actually depend on it
+"""
+
+import argparse
+import hashlib
+import inspect
+import json
+import os
+import posixpath
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+import bibliography
+import feed
+import md_to_html_converter as converter
+import passage_index
+import related_notes
+import service_worker
+
+STATE_FILE = os.path.join('.build', 'state.json')
+NOTES_DIR = 'notes'
+INDEX_PAGE = os.path.join(NOTES_DIR, 'index.html')
+# Output kinds of the dependency graph, selectable with --only
+OUTPUT_KINDS = ['note', 'index', 'feed', 'paper', 'author', 'bibtex', 'passage_index', 'service_worker']
+
+# Converter functions whose source is baked into every generated page
+TEMPLATE_FUNCTIONS = [
+    'generate_css',
+    'generate_html_content',
+    'convert_markdown_to_html',
+    'merge_paragraphs',
+    'render_inline',
+    'render_note',
+    'strip_title_heading',
+    'heading_text',
+    'slugify_heading',
+    'generate_toc_html',
+    'split_lazy_sections',
+    'extract_paper_info',
+    'clean_field',
+    'normalize_doi',
+    'extract_description',
+    'generate_keywords',
+]
+
+# Shared files every page is declared to depend on
+SHARED_FILES = {
+    'partial': ['partials/header.html'],
+    'asset': ['assets/css/modern.css', 'assets/js/include-header.js'],
+}
+
+# Hrefs that point at another note, e.g. other-note.md, /notes/other-note
+# or https://lsy641.github.io/notes/other-note.html
+NOTE_HREF_PATTERN = re.compile(r'^(?:(?:https?://[^/]+)?/?notes/([\w.-]+?)(?:\.md|\.html)?|([\w.-]+?)\.md)(?:#.*)?$')
+
+def hash_bytes(data):
+    """Return a short, stable content hash"""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()[:16]
+
+def hash_file(path):
+    """Hash a file's bytes, or return None when it does not exist"""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'rb') as f:
+        return hash_bytes(f.read())
+
+def extract_title(markdown_content, stem):
+    """Use the first H1 heading as the note title, falling back to the file name"""
+    match = re.search(r'^# (.+?)\s*$', markdown_content, flags=re.MULTILINE)
+    if match:
+        return match.group(1).strip()
+    return stem.replace('-', ' ').replace('_', ' ').title()
+
+def note_href_stem(href):
+    """Return the note stem an href points at, or None for any other link"""
+    match = NOTE_HREF_PATTERN.match(href.strip())
+    if not match:
+        return None
+    return match.group(1) or match.group(2)
+
+def extract_note_links(markdown_content, known_stems):
+    """Return the stems of other notes linked from this note"""
+    links = set()
+    for href in re.findall(r'\]\(([^)\s]+)\)', markdown_content):
+        stem = note_href_stem(href)
+        if stem in known_stems:
+            links.add(stem)
+    return links
+
+def discover_notes(root):
+    """Load every markdown note under notes/ with the metadata the graph needs"""
+    notes_dir = os.path.join(root, NOTES_DIR)
+    notes = {}
+    if not os.path.isdir(notes_dir):
+        return notes
+    for name in sorted(os.listdir(notes_dir)):
+        if not name.endswith('.md'):
+            continue
+        stem = name[:-3]
+        source = os.path.join(NOTES_DIR, name)
+        with open(os.path.join(root, source), 'r', encoding='utf-8') as f:
+            markdown_content = f.read()
+        notes[stem] = {
+            'stem': stem,
+            'source': source,
+            'output': os.path.join(NOTES_DIR, stem + '.html'),
+            'markdown': markdown_content,
+            'title': extract_title(markdown_content, stem),
+            'description': converter.extract_description(markdown_content),
+        }
+    for note in notes.values():
+        note['links'] = sorted(extract_note_links(note['markdown'], notes.keys() - {note['stem']}))
+    return notes
+
+def section_fragment_prefix(stem):
+    """File name prefix of a split note's lazy-loaded sections"""
+    return f'{stem}.part-'
+
+def is_section_fragment(name, notes):
+    """Whether a file under notes/ is a lazy-loaded section of a generated note"""
+    match = re.match(r'^(.+)\.part-\d+\.html$', name)
+    return bool(match) and match.group(1) in notes
+
+def new_graph():
+    """Create an empty dependency graph: node hashes plus dependency edges"""
+    return {'nodes': {}, 'deps': {}, 'outputs': {}}
+
+def add_node(graph, node, node_hash, deps=(), output=None):
+    """Add a node with its content hash; output nodes also record their page kind"""
+    graph['nodes'][node] = node_hash
+    graph['deps'][node] = sorted(set(deps))
+    if output is not None:
+        graph['outputs'][node] = output
+
+def dependents_of(graph):
+    """Invert the dependency edges: node -> nodes that depend on it"""
+    dependents = {node: set() for node in graph['nodes']}
+    for node, deps in graph['deps'].items():
+        for dep in deps:
+            dependents.setdefault(dep, set()).add(node)
+    return dependents
+
+def build_dependency_graph(root, notes, domain, bib_outputs=(), bib_fingerprints=None, feed_entries=(), split_threshold=None):
+    """Record every source, template, partial, asset and page node with its edges"""
+    graph = new_graph()
+
+    shared = []
+    for func_name in TEMPLATE_FUNCTIONS:
+        node = f'template:{func_name}'
+        add_node(graph, node, hash_bytes(inspect.getsource(getattr(converter, func_name))))
+        shared.append(node)
+    # Registered markdown rules (extensions included) shape every note as well
+    rules_source = ''.join(f'{kind} {trigger} {priority} {name} {pattern}\n{inspect.getsource(func)}'
+                           for kind, trigger, priority, name, pattern, func in converter.registered_rules())
+    add_node(graph, 'template:markdown_rules', hash_bytes(rules_source))
+    shared.append('template:markdown_rules')
+    for kind, paths in SHARED_FILES.items():
+        for path in paths:
+            node = f'{kind}:{path}'
+            add_node(graph, node, hash_file(os.path.join(root, path)))
+            shared.append(node)
+    add_node(graph, 'config:domain', hash_bytes(domain))
+    shared.append('config:domain')
+    add_node(graph, 'template:LAZY_SECTIONS_SCRIPT', hash_bytes(converter.LAZY_SECTIONS_SCRIPT))
+    shared.append('template:LAZY_SECTIONS_SCRIPT')
+    add_node(graph, 'config:split_threshold', hash_bytes(str(split_threshold)))
+
+    for note in notes.values():
+        # The raw source drives the note's own page; the title/description "meta" node
+        # is what the index and linking pages consume, so body-only edits stop there
+        add_node(graph, f"source:{note['source']}", hash_bytes(note['markdown']))
+        add_node(graph, f"meta:{note['stem']}", hash_bytes(note['title'] + '\n' + note['description']),
+                 [f"source:{note['source']}"])
+
+    for note in notes.values():
+        deps = [f"source:{note['source']}", f"meta:{note['stem']}", 'config:split_threshold'] + shared
+        deps += [f'meta:{stem}' for stem in note['links']]
+        # Related notes only rebuild a page when its neighbour list (or their titles) change
+        add_node(graph, f"related:{note['stem']}", hash_bytes('\n'.join(note['related'])))
+        deps += [f"related:{note['stem']}", 'template:generate_related_notes_html']
+        deps += [f'meta:{stem}' for stem in note['related']]
+        add_node(graph, f"page:{note['output']}", None, deps,
+                 {'kind': 'note', 'stem': note['stem'], 'path': note['output']})
+
+    add_node(graph, 'template:generate_related_notes_html',
+             hash_bytes(inspect.getsource(related_notes.generate_related_notes_html)))
+
+    index_deps = [f'meta:{stem}' for stem in notes] + shared + ['template:generate_notes_index']
+    add_node(graph, 'template:generate_notes_index', hash_bytes(inspect.getsource(generate_notes_index)))
+    add_node(graph, f'page:{INDEX_PAGE}', None, index_deps, {'kind': 'index', 'path': INDEX_PAGE})
+
+    # The feed only changes when one of its (capped) entries does
+    add_node(graph, 'template:feed', hash_bytes(inspect.getsource(feed)))
+    add_node(graph, 'feed:entries', hash_bytes(''.join(entry['xml'] for entry in feed_entries)))
+    add_node(graph, f'page:{feed.FEED_FILE}', None, ['feed:entries', 'template:feed', 'config:domain'],
+             {'kind': 'feed', 'path': feed.FEED_FILE})
+
+    # Bibliography pages depend on the papers they list, not on the notes directly
+    add_node(graph, 'template:bibliography', hash_bytes(inspect.getsource(bibliography)))
+    for key, fingerprint in (bib_fingerprints or {}).items():
+        add_node(graph, f'paper:{key}', hash_bytes(fingerprint))
+    for output in bib_outputs:
+        deps = [f'paper:{key}' for key in output['papers']]
+        deps += ['template:bibliography', 'template:generate_css', 'config:domain']
+        add_node(graph, f"page:{output['path']}", None, deps, output)
+
+    # sw.js hashes the finished pages, so it depends on them and is scheduled after them
+    static_pages = []
+    for path in service_worker.SHARED_ASSETS:
+        add_node(graph, f'static:{path}', hash_file(os.path.join(root, path)))
+        static_pages.append(f'static:{path}')
+    for path in service_worker.ROOT_PAGES:
+        add_node(graph, f'static:{path}', hash_file(os.path.join(root, path)))
+        static_pages.append(f'static:{path}')
+    for directory in service_worker.ASSET_DIRS:
+        full_dir = os.path.join(root, directory)
+        names = sorted(os.listdir(full_dir)) if os.path.isdir(full_dir) else []
+        add_node(graph, f'static:{directory}/', hash_bytes(''.join(
+            name + (hash_file(os.path.join(full_dir, name)) or '') for name in names)))
+        static_pages.append(f'static:{directory}/')
+    # Hand-written pages under notes/ (with no markdown source) are precached too
+    notes_dir = os.path.join(root, NOTES_DIR)
+    hand_written = sorted(name for name in (os.listdir(notes_dir) if os.path.isdir(notes_dir) else [])
+                          if name.endswith('.html') and name != os.path.basename(INDEX_PAGE)
+                          and name[:-len('.html')] not in notes
+                          and not is_section_fragment(name, notes))
+    add_node(graph, f'static:{NOTES_DIR}/', hash_bytes(''.join(
+        name + (hash_file(os.path.join(notes_dir, name)) or '') for name in hand_written)))
+    static_pages.append(f'static:{NOTES_DIR}/')
+    # The passage index covers every note's text, hand-written notes included
+    if passage_index.np is not None:
+        add_node(graph, 'template:passage_index', hash_bytes(inspect.getsource(passage_index)))
+        add_node(graph, f'page:{passage_index.INDEX_FILE}', None,
+                 [f"source:{note['source']}" for note in notes.values()]
+                 + [f'static:{NOTES_DIR}/', 'template:passage_index', 'template:convert_markdown_to_html',
+                    'template:strip_title_heading',
+                    'template:merge_paragraphs', 'template:render_inline', 'template:markdown_rules'],
+                 {'kind': 'passage_index', 'path': passage_index.INDEX_FILE})
+
+    note_pages = [node for node, output in graph['outputs'].items()
+                  if output['kind'] in ('note', 'index', 'passage_index')]
+    add_node(graph, 'template:service_worker', hash_bytes(inspect.getsource(service_worker)))
+    add_node(graph, f'page:{service_worker.SERVICE_WORKER_FILE}', None,
+             note_pages + static_pages + shared + ['template:service_worker'],
+             {'kind': 'service_worker', 'path': service_worker.SERVICE_WORKER_FILE})
+
+    return graph
+
+def invalidation_set(graph, previous, root):
+    """Compute the minimal set of output pages affected by the changed nodes"""
+    previous_nodes = previous.get('nodes', {}) if previous else {}
+    changed = {node for node, node_hash in graph['nodes'].items()
+               if node not in graph['outputs'] and previous_nodes.get(node, '') != node_hash}
+    # Nodes that disappeared (deleted notes) invalidate whatever used to depend on them
+    changed |= set(previous_nodes) - set(graph['nodes'])
+
+    dependents = dependents_of(graph)
+    for node, deps in (previous or {}).get('deps', {}).items():
+        for dep in deps:
+            if dep not in graph['nodes'] and node in graph['nodes']:
+                dependents.setdefault(dep, set()).add(node)
+
+    # Hashed nodes (e.g. a note's meta) decide for themselves whether they changed, so
+    # a body edit stops at the source node and only rebuilt pages propagate further
+    affected = set()
+    stack = list(changed)
+    while stack:
+        node = stack.pop()
+        for dependent in dependents.get(node, ()):
+            if dependent not in graph['outputs']:
+                continue
+            if dependent not in affected:
+                affected.add(dependent)
+                stack.append(dependent)
+
+    # Outputs that are missing on disk or new to the graph always need building
+    for node, output in graph['outputs'].items():
+        if node not in previous_nodes or not os.path.exists(os.path.join(root, output['path'])):
+            affected.add(node)
+
+    return changed, {node for node in affected if node in graph['outputs']}
+
+def topological_levels(graph, nodes):
+    """Group nodes into levels where each level only depends on earlier levels"""
+    nodes = set(nodes)
+    remaining = {node: {dep for dep in graph['deps'].get(node, ()) if dep in nodes} for node in nodes}
+    levels = []
+    while remaining:
+        ready = sorted(node for node, deps in remaining.items() if not deps)
+        if not ready:
+            raise ValueError(f"Dependency cycle between: {', '.join(sorted(remaining))}")
+        levels.append(ready)
+        for node in ready:
+            del remaining[node]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return levels
+
+def generate_notes_index(notes, author="Siyang Liu", domain="https://lsy641.github.io"):
+    """Generate the notes/ landing page listing every note"""
+    items = '\n'.join(
+        f'''            <li>
+                <strong><a href="{domain}/notes/{note['stem']}">{note['title']}</a></strong><br>
+                <span>{note['description']}</span>
+            </li>'''
+        for note in sorted(notes.values(), key=lambda note: note['title'].lower())
+    )
+    return f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Reading Notes | {author}</title>
+    <meta name="description" content="Reading notes on research papers and courses by {author}" />
+    <meta name="author" content="{author}" />
+    <link rel="canonical" href="{domain}/notes/" />
+    <link rel="up" href="{domain}/research-notes" />
+    <link rel="alternate" type="application/atom+xml" title="Research Notes" href="{domain}/{feed.FEED_FILE}" />
+    {converter.generate_css()}
+</head>
+<body>
+    <!-- Breadcrumb Navigation -->
+    <nav class="breadcrumb" aria-label="Breadcrumb">
+        <a href="{domain}/">Home</a> &gt;
+        <a href="{domain}/research-notes">Research Notes</a> &gt;
+        Reading Notes
+    </nav>
+
+    <article>
+        <h2>Reading Notes</h2>
+        <ul>
+{items}
+        </ul>
+
+        <h2>Find similar passages</h2>
+        <form data-passage-search role="search">
+            <input type="search" name="q" placeholder="Describe an idea, e.g. sim-to-real transfer" aria-label="Find similar passages" />
+            <button type="submit">Search</button>
+            <ol data-results></ol>
+        </form>
+    </article>
+    <script src="/assets/js/similar-passages.js" defer></script>
+</body>
+</html>"""
+
+def link_note_titles(html_content, notes, domain):
+    """Point cross-note links at the published page and label them with the target's title"""
+    def replace(match):
+        stem = note_href_stem(match.group(1))
+        if stem not in notes:
+            return match.group(0)
+        return f'<a href="{domain}/notes/{stem}" title="{notes[stem]["title"]}"'
+    return re.sub(r'<a href="([^"]*)"', replace, html_content)
+
+def stale_section_fragments(root, stem, keep):
+    """Sections left behind by a longer version of a split note"""
+    notes_dir = os.path.join(root, NOTES_DIR)
+    return [os.path.join(notes_dir, name) for name in sorted(os.listdir(notes_dir))
+            if name.startswith(section_fragment_prefix(stem)) and name.endswith('.html') and name not in keep]
+
+def render_page(task):
+    """Render one output page inside a worker process; returns (path, [(path, content), ...])
+
+    Workers only render. The main process owns the writes so they can be batched,
+    skipped when identical and committed atomically.
+    """
+    root, output, notes, author, domain = task['root'], task['output'], task['notes'], task['author'], task['domain']
+    files = []
+
+    if output['kind'] == 'index':
+        html_content = generate_notes_index(notes, author, domain)
+    elif output['kind'] == 'service_worker':
+        html_content = service_worker.generate_service_worker(root)
+    elif output['kind'] == 'feed':
+        html_content = feed.render_feed(root, author, domain)
+    elif output['kind'] in ('paper', 'author', 'bibtex'):
+        html_content = bibliography.render_output(root, output, author, domain)
+    elif output['kind'] == 'passage_index':
+        html_content, meta = passage_index.build_passage_index(root, notes)
+        files.append((passage_index.META_FILE, meta))
+    else:
+        note = notes[output['stem']]
+        fragments = []
+        html_content = converter.render_note(converter.strip_title_heading(note['markdown']), note['title'], author, domain,
+                                             task['split_threshold'], section_fragment_prefix(note['stem']), fragments,
+                                             note.get('modified'), f"{domain}/notes/{note['stem']}")
+        links = {stem: notes[stem] for stem in note['links']}
+        html_content = link_note_titles(html_content, links, domain)
+        related_html = related_notes.generate_related_notes_html(note['related'], notes, domain)
+        html_content = html_content.replace('<footer>', related_html + '<footer>', 1)
+        files += [(posixpath.join(NOTES_DIR, name), link_note_titles(fragment_html, links, domain))
+                  for name, fragment_html in fragments]
+
+    return output['path'], [(output['path'], html_content)] + files
+
+def load_state(root):
+    """Load the graph recorded by the previous build"""
+    path = os.path.join(root, STATE_FILE)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        print(f"Warning: ignoring unreadable build state '{path}'")
+        return None
+
+def save_state(root, graph, fsync=True):
+    """Persist the graph so the next build can diff against it"""
+    path = os.path.join(root, STATE_FILE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    state = json.dumps({'built': datetime.now().isoformat(timespec='seconds'), **graph}, indent=1, sort_keys=True)
+    # Atomic, so an interrupted build can never leave a truncated graph behind
+    converter.OutputWriter(fsync=fsync).write(path, state)
+
+def build_site(root='.', author="Siyang Liu", domain="https://lsy641.github.io", workers=None, force=False, dry_run=False, split_threshold=None, fsync=True, only=None):
+    """Rebuild only the pages invalidated since the last build; returns the rebuilt paths
+
+    ``only`` names output kinds (e.g. ``feed``) to build unconditionally on their own,
+    leaving every other page as it is on disk and the recorded graph untouched.
+    """
+    notes = discover_notes(root)
+    doc_hashes = {stem: hash_bytes(note['markdown']) for stem, note in notes.items()}
+    # A dry run must leave every cache and database exactly as it found them
+    for stem, related in related_notes.compute_related_notes(root, notes, doc_hashes, dry_run=dry_run).items():
+        notes[stem]['related'] = related
+
+    conn = bibliography.open_database(root, dry_run)
+    try:
+        bibliography.sync_bibliography(conn, notes, doc_hashes)
+        bib_outputs = bibliography.bibliography_outputs(conn)
+        bib_fingerprints = {key: bibliography.paper_fingerprint(conn, key)
+                            for key in bibliography.paper_keys(conn)}
+    finally:
+        conn.close()
+
+    feed_entries = feed.update_feed_entries(root, notes, doc_hashes, domain, dry_run=dry_run)
+    # Stamp pages with their note's last change rather than the build time, so
+    # re-rendering an unchanged note produces identical bytes and skips the write
+    for stem, entry in feed.load_feed_state(root).items():
+        if stem in notes:
+            notes[stem]['modified'] = datetime.strptime(entry['updated'], '%Y-%m-%dT%H:%M:%SZ').replace(tzinfo=timezone.utc)
+
+    graph = build_dependency_graph(root, notes, domain, bib_outputs, bib_fingerprints, feed_entries, split_threshold)
+    previous = None if force else load_state(root)
+
+    changed, invalid = invalidation_set(graph, previous, root)
+    if force:
+        invalid = set(graph['outputs'])
+    if only:
+        invalid = {node for node, output in graph['outputs'].items() if output['kind'] in only}
+
+    if dry_run:
+        for node in sorted(changed):
+            print(f"changed: {node}")
+        for node in sorted(invalid):
+            print(f"rebuild: {graph['outputs'][node]['path']}")
+        return sorted(graph['outputs'][node]['path'] for node in invalid)
+
+    # Deleted notes leave stale pages behind; remove them with the rest of the graph
+    for node, output in ({} if only else previous or {}).get('outputs', {}).items():
+        if node not in graph['outputs'] and os.path.exists(os.path.join(root, output['path'])):
+            os.remove(os.path.join(root, output['path']))
+            print(f"Removed stale page '{output['path']}'")
+
+    if not invalid:
+        print("Site is up to date")
+        if not only:
+            save_state(root, graph, fsync)
+        return []
+
+    rebuilt = []
+    writer = converter.OutputWriter(fsync=fsync, batch=True)
+    levels = topological_levels(graph, invalid)
+    with ProcessPoolExecutor(max_workers=workers) as executor, writer:
+        for level in levels:
+            tasks = [{'root': root, 'output': graph['outputs'][node], 'notes': notes,
+                      'author': author, 'domain': domain, 'split_threshold': split_threshold} for node in level]
+            for task, (path, files) in zip(tasks, executor.map(render_page, tasks)):
+                for file_path, content in files:
+                    writer.write(os.path.join(root, file_path), content)
+                if task['output']['kind'] == 'note':
+                    keep = {posixpath.basename(file_path) for file_path, _ in files}
+                    for stale_path in stale_section_fragments(root, task['output']['stem'], keep):
+                        os.remove(stale_path)
+                print(f"Built '{path}'")
+                rebuilt.append(path)
+            # Later levels (sw.js) read this level's pages from disk
+            writer.flush()
+
+    # A partial build says nothing about the other pages, so it must not record them as built
+    if not only:
+        save_state(root, graph, fsync)
+    print(f"Rebuilt {len(rebuilt)} of {len(graph['outputs'])} pages "
+          f"({writer.written} files written, {writer.skipped} unchanged)")
+    return rebuilt
+
+def main():
+    """Main function for command line usage"""
+    parser = argparse.ArgumentParser(description="Incrementally build the research notes")
+    parser.add_argument('root', nargs='?', default='.', help="site root containing notes/ (default: .)")
+    parser.add_argument('--author', default="Siyang Liu")
+    parser.add_argument('--domain', default="https://lsy641.github.io")
+    parser.add_argument('--workers', type=int, default=None, help="parallel render processes (default: CPU count)")
+    parser.add_argument('--force', action='store_true', help="ignore the recorded graph and rebuild everything")
+    parser.add_argument('--dry-run', action='store_true', help="print the invalidation set without building")
+    parser.add_argument('--split-threshold', type=int, default=None, metavar='BYTES',
+                        help="split notes whose body HTML exceeds BYTES into lazy-loaded sections")
+    parser.add_argument('--no-fsync', action='store_true',
+                        help="skip fsync when committing outputs (fast path for throwaway CI builds)")
+    parser.add_argument('--only', action='append', choices=OUTPUT_KINDS, metavar='KIND',
+                        help=f"build just this output kind, repeatable ({', '.join(OUTPUT_KINDS)})")
+    args = parser.parse_args()
+
+    build_site(args.root, args.author, args.domain, args.workers, args.force, args.dry_run, args.split_threshold,
+               not args.no_fsync, args.only)
+
+if __name__ == "__main__":
+    main()
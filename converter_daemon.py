@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Markdown Converter Daemon
+Keeps md_to_html_converter warm in a long-running process that answers requests
+over a Unix socket, plus the thin client editors and pre-commit hooks call instead
+of starting a fresh interpreter for every conversion
+"""
+
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+import time
+
+import md_to_html_converter as converter
+
+DEFAULT_IDLE_TIMEOUT = 600
+DEFAULT_MAX_CONCURRENT = 4
+CLIENT_RETRIES = 20
+MAX_REQUEST_BYTES = 16 * 1024 * 1024
+
+def default_socket_path():
+    """Per-user socket path, preferring the runtime directory when there is one"""
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir and os.path.isdir(runtime_dir):
+        return os.path.join(runtime_dir, 'md_to_html_converter.sock')
+    return os.path.join('/tmp', f'md_to_html_converter-{os.getuid()}.sock')
+
+def handle_request(request):
+    """Run one request against the warm converter; returns the response dict"""
+    op = request.get('op')
+    if op == 'ping':
+        return {'ok': True, 'pid': os.getpid()}
+    if op == 'render':
+        title = request.get('title', 'Document')
+        if request.get('body_only'):
+            html_content = converter.convert_markdown_to_html(request.get('markdown', ''))
+        else:
+            html_content = converter.render_note(request.get('markdown', ''), title,
+                                                 request.get('author', "Siyang Liu"),
+                                                 request.get('domain', "https://lsy641.github.io"),
+                                                 page_url=request.get('url'))
+        return {'ok': True, 'html': html_content}
+    if op == 'convert':
+        if not request.get('input'):
+            return {'ok': False, 'error': "convert needs an 'input' path"}
+        ok = converter.convert_file(request['input'], request.get('output'), request.get('title'),
+                                    request.get('author', "Siyang Liu"), request.get('domain', "https://lsy641.github.io"),
+                                    request.get('split_threshold'))
+        return {'ok': ok} if ok else {'ok': False, 'error': f"could not convert '{request['input']}'"}
+    return {'ok': False, 'error': f"unknown op '{op}'"}
+
+class ConverterRequestHandler(socketserver.StreamRequestHandler):
+    """One JSON request per line, one JSON response per line, on a persistent connection"""
+
+    def handle(self):
+        server = self.server
+        while True:
+            # Bounded read: an endless line is cut off at the limit instead of buffered whole
+            line = self.rfile.readline(MAX_REQUEST_BYTES + 1)
+            if not line:
+                return
+            server.touch()
+            if len(line) > MAX_REQUEST_BYTES:
+                self.respond({'ok': False, 'error': 'request too large'})
+                return
+            try:
+                request = json.loads(line)
+            except ValueError:
+                self.respond({'ok': False, 'error': 'malformed JSON request'})
+                continue
+            if not isinstance(request, dict):
+                self.respond({'ok': False, 'error': 'request must be a JSON object'})
+                continue
+
+            if request.get('op') == 'shutdown':
+                self.respond({'ok': True})
+                threading.Thread(target=server.shutdown, daemon=True).start()
+                return
+
+            # Backpressure: refuse instead of queueing unboundedly; the client backs off
+            if not server.slots.acquire(blocking=False):
+                self.respond({'ok': False, 'busy': True, 'error': 'daemon busy, retry'})
+                continue
+            server.track(1)
+            try:
+                response = handle_request(request)
+            except Exception as e:
+                response = {'ok': False, 'error': f'{type(e).__name__}: {e}'}
+            finally:
+                server.track(-1)
+                server.slots.release()
+            self.respond(response)
+
+    def respond(self, response):
+        self.wfile.write((json.dumps(response) + '\n').encode('utf-8'))
+        self.wfile.flush()
+
+class ConverterServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Threaded Unix socket server that bounds concurrent work and exits when idle"""
+    daemon_threads = True
+
+    def __init__(self, socket_path, max_concurrent=DEFAULT_MAX_CONCURRENT, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.idle_timeout = idle_timeout
+        self.last_activity = time.monotonic()
+        self.active = 0
+        self.active_lock = threading.Lock()
+        super().__init__(socket_path, ConverterRequestHandler)
+
+    def touch(self):
+        self.last_activity = time.monotonic()
+
+    def track(self, delta):
+        """Count in-flight requests so the idle watcher never stops mid-conversion"""
+        with self.active_lock:
+            self.active += delta
+            self.last_activity = time.monotonic()
+
+    def watch_idle(self):
+        """Shut down once no request has arrived for idle_timeout seconds"""
+        while True:
+            time.sleep(min(5, self.idle_timeout))
+            if self.active == 0 and time.monotonic() - self.last_activity >= self.idle_timeout:
+                print(f"Idle for {self.idle_timeout}s, shutting down")
+                self.shutdown()
+                return
+
+def serve(socket_path=None, max_concurrent=DEFAULT_MAX_CONCURRENT, idle_timeout=DEFAULT_IDLE_TIMEOUT):
+    """Run the daemon in the foreground until shut down or idle"""
+    socket_path = socket_path or default_socket_path()
+    if os.path.exists(socket_path):
+        if ping(socket_path):
+            print(f"Error: a converter daemon is already listening on '{socket_path}'")
+            return False
+        os.remove(socket_path)
+
+    # Keep the log readable when stdout is redirected to a file
+    sys.stdout.reconfigure(line_buffering=True)
+    # Bind under a private umask so the socket is never reachable by other users, not even
+    # briefly; no other thread is running yet, so changing the process-wide umask is safe
+    previous_umask = os.umask(0o077)
+    try:
+        server = ConverterServer(socket_path, max_concurrent, idle_timeout)
+    finally:
+        os.umask(previous_umask)
+    if idle_timeout:
+        threading.Thread(target=server.watch_idle, daemon=True).start()
+    print(f"Converter daemon listening on '{socket_path}' (pid {os.getpid()})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+    return True
+
+def request(payload, socket_path=None, retries=CLIENT_RETRIES):
+    """Send one request to the daemon, backing off while it reports busy"""
+    socket_path = socket_path or default_socket_path()
+    delay = 0.01
+    for attempt in range(retries + 1):
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(socket_path)
+            sock.sendall((json.dumps(payload) + '\n').encode('utf-8'))
+            with sock.makefile('rb') as stream:
+                response = json.loads(stream.readline() or b'{"ok": false, "error": "no response"}')
+        if not response.get('busy') or attempt == retries:
+            return response
+        time.sleep(delay)
+        delay = min(delay * 2, 0.5)
+    return response
+
+def ping(socket_path=None):
+    """Whether a daemon is answering on the socket"""
+    try:
+        return request({'op': 'ping'}, socket_path, retries=0).get('ok', False)
+    except OSError:
+        return False
+
+def main():
+    """Main function for command line usage"""
+    parser = argparse.ArgumentParser(description="Warm markdown converter daemon and client")
+    parser.add_argument('--socket', default=None, help="Unix socket path (default: per-user runtime path)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    serve_parser = commands.add_parser('serve', help="run the daemon in the foreground")
+    serve_parser.add_argument('--max-concurrent', type=int, default=DEFAULT_MAX_CONCURRENT)
+    serve_parser.add_argument('--idle-timeout', type=float, default=DEFAULT_IDLE_TIMEOUT,
+                              help="seconds without requests before exiting (0 disables)")
+
+    convert_parser = commands.add_parser('convert', help="convert a markdown file")
+    convert_parser.add_argument('input')
+    convert_parser.add_argument('output', nargs='?')
+    convert_parser.add_argument('--title')
+
+    render_parser = commands.add_parser('render', help="render markdown from stdin to HTML on stdout")
+    render_parser.add_argument('--title', default='Document')
+    render_parser.add_argument('--url', help="published URL of the page, for its canonical link")
+    render_parser.add_argument('--body-only', action='store_true', help="emit only the converted body")
+
+    commands.add_parser('ping', help="check whether the daemon is running")
+    commands.add_parser('shutdown', help="stop the daemon")
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        sys.exit(0 if serve(args.socket, args.max_concurrent, args.idle_timeout) else 1)
+
+    if args.command == 'convert':
+        payload = {'op': 'convert', 'input': os.path.abspath(args.input),
+                   'output': os.path.abspath(args.output) if args.output else None, 'title': args.title}
+    elif args.command == 'render':
+        payload = {'op': 'render', 'markdown': sys.stdin.read(), 'title': args.title, 'url': args.url,
+                   'body_only': args.body_only}
+    else:
+        payload = {'op': args.command}
+
+    try:
+        response = request(payload, args.socket)
+    except OSError as e:
+        print(f"Error: converter daemon is not reachable ({e}); start it with 'python converter_daemon.py serve'")
+        sys.exit(2)
+
+    if not response.get('ok'):
+        print(f"Error: {response.get('error', 'request failed')}")
+        sys.exit(1)
+    if args.command == 'render':
+        sys.stdout.write(response['html'])
+    elif args.command == 'ping':
+        print(f"Converter daemon running (pid {response['pid']})")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Atom Feed Generator
+Maintains feed.xml from the build's note catalog, touching only the entries whose
+content changed so the feed (and its timestamps) only move when a note does
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime, timezone
+from xml.sax.saxutils import escape, quoteattr
+
+FEED_FILE = 'feed.xml'
+FEED_STATE = os.path.join('.build', 'feed-entries.json')
+FEED_LIMIT = 20
+FEED_NAMESPACE = 'https://lsy641.github.io/ns/feed'
+
+def utc_timestamp(now=None):
+    """RFC 3339 timestamp as Atom expects"""
+    return (now or datetime.now(timezone.utc)).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def load_feed_state(root):
+    """Load the cached entries from the previous build, keyed by note stem"""
+    path = os.path.join(root, FEED_STATE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def save_feed_state(root, state):
+    """Persist entries so unchanged notes keep their timestamps and rendered XML"""
+    path = os.path.join(root, FEED_STATE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+
+def generate_entry_xml(entry, domain="https://lsy641.github.io"):
+    """Render one <entry>; cached so unchanged notes are never re-rendered"""
+    link = f"{domain}/notes/{entry['stem']}"
+    return f"""  <entry>
+    <id>{escape(entry['id'])}</id>
+    <title>{escape(entry['title'])}</title>
+    <link rel="alternate" type="text/html" href={quoteattr(link)} />
+    <published>{entry['published']}</published>
+    <updated>{entry['updated']}</updated>
+    <summary>{escape(entry['summary'])}</summary>
+    <site:contentHash>sha256:{entry['sha256']}</site:contentHash>
+  </entry>
+"""
+
+def update_feed_entries(root, notes, doc_hashes, domain="https://lsy641.github.io", now=None, dry_run=False):
+    """Refresh only the entries whose note changed; returns the latest FEED_LIMIT entries
+
+    A dry run computes the entries without persisting them.
+    """
+    state = load_feed_state(root)
+    timestamp = utc_timestamp(now)
+    host = domain.split('://', 1)[-1].rstrip('/')
+    entries = {}
+    for stem, note in notes.items():
+        previous = state.get(stem)
+        # The build's short hash decides freshness; the feed publishes the full digest
+        digest = hashlib.sha256(note['markdown'].encode('utf-8')).hexdigest()
+        if (previous and previous['content_hash'] == doc_hashes[stem]
+                and previous['title'] == note['title'] and previous.get('domain') == domain):
+            if previous.get('sha256') != digest:
+                # Entries cached before the digest was recorded keep their timestamps
+                previous = dict(previous, sha256=digest)
+                previous['xml'] = generate_entry_xml(previous, domain)
+            entries[stem] = previous
+            continue
+        published = previous['published'] if previous else timestamp
+        entry = {
+            'stem': stem,
+            # Tag URIs are minted once and reused, so title edits never change an entry's identity
+            'id': previous['id'] if previous else f"tag:{host},{published[:10]}:notes/{stem}",
+            'title': note['title'],
+            'summary': note['description'],
+            'published': published,
+            'updated': timestamp,
+            'content_hash': doc_hashes[stem],
+            'sha256': digest,
+            'domain': domain,
+        }
+        entry['xml'] = generate_entry_xml(entry, domain)
+        entries[stem] = entry
+
+    if not dry_run:
+        save_feed_state(root, entries)
+    latest = sorted(entries.values(), key=lambda entry: (entry['updated'], entry['stem']), reverse=True)
+    return latest[:FEED_LIMIT]
+
+def generate_atom_feed(entries, author="Siyang Liu", domain="https://lsy641.github.io"):
+    """Assemble the feed document from cached entry XML"""
+    host = domain.split('://', 1)[-1].rstrip('/')
+    # The feed is as new as its newest entry, so rebuilding unchanged notes never bumps it
+    updated = max((entry['updated'] for entry in entries), default='1970-01-01T00:00:00Z')
+    return f"""<?xml version="1.0" encoding="utf-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom" xmlns:site="{FEED_NAMESPACE}">
+  <id>tag:{host},2025:notes</id>
+  <title>Research Notes - {escape(author)}</title>
+  <link rel="self" type="application/atom+xml" href={quoteattr(f'{domain}/{FEED_FILE}')} />
+  <link rel="alternate" type="text/html" href={quoteattr(f'{domain}/research-notes')} />
+  <updated>{updated}</updated>
+  <author>
+    <name>{escape(author)}</name>
+    <uri>{escape(domain)}/</uri>
+  </author>
+{''.join(entry['xml'] for entry in entries)}</feed>
+"""
+
+def render_feed(root, author="Siyang Liu", domain="https://lsy641.github.io"):
+    """Render feed.xml from the persisted entries; used by the build workers"""
+    entries = sorted(load_feed_state(root).values(), key=lambda entry: (entry['updated'], entry['stem']), reverse=True)
+    return generate_atom_feed(entries[:FEED_LIMIT], author, domain)
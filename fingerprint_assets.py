@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Asset Fingerprinting Pass
+Copies every static asset to a content-hashed name (modern.css -> modern.1a2b3c4d.css),
+rewrites every href/src in the site's HTML to point at it in a single tokenizer pass
+and writes asset-manifest.json, so assets can be cached as immutable
+"""
+
+import hashlib
+import json
+import os
+import posixpath
+import re
+import sys
+from urllib.parse import urlsplit
+
+import md_to_html_converter as converter
+import service_worker
+from asset_manifest import HASH_LENGTH, MANIFEST_FILE, PRECOMPRESSED_SUFFIXES, original_path, strip_precompressed
+
+ASSET_DIRS = ['assets', 'images']
+SKIP_DIRS = {'.git', '.build', '.github', 'node_modules', '__pycache__'}
+SITE_HOSTS = {'lsy641.github.io'}
+
+# One pass over the document: comments, script/style elements and tags. Only tags
+# (including a script's opening tag) are rewritten; comments and raw text pass through
+HTML_TOKEN = re.compile(
+    r'(?P<comment><!--.*?-->)'
+    r'|(?P<raw_open><(?P<raw_name>script|style)\b[^>]*>)(?P<raw_body>.*?)(?P<raw_close></(?P=raw_name)\s*>)'
+    r'|(?P<tag><[a-zA-Z][^>]*>)',
+    re.DOTALL | re.IGNORECASE)
+URL_ATTRIBUTE = re.compile(r'''(?P<name>\b(?:href|src|srcset|poster|data-src))(?P<eq>\s*=\s*)(?P<value>"[^"]*"|'[^']*'|[^\s>]+)''',
+                           re.IGNORECASE)
+CSS_URL = re.compile(r'''url\(\s*(?P<quote>['"]?)(?P<url>[^'")]+)(?P=quote)\s*\)''')
+
+def content_hash(data):
+    """Full SHA-256 of the bytes; the fingerprint uses a prefix of it"""
+    return hashlib.sha256(data).hexdigest()
+
+def fingerprinted_path(path, digest):
+    """assets/css/modern.css -> assets/css/modern.<hash>.css"""
+    directory, name = posixpath.split(path)
+    stem, ext = posixpath.splitext(name)
+    return posixpath.join(directory, f'{stem}.{digest[:HASH_LENGTH]}{ext}')
+
+def discover_assets(root):
+    """Source asset paths (site-relative, '/' separated), skipping earlier fingerprinted copies"""
+    assets = []
+    for asset_dir in ASSET_DIRS:
+        for dirpath, dirnames, filenames in os.walk(os.path.join(root, asset_dir)):
+            dirnames[:] = sorted(name for name in dirnames if name not in SKIP_DIRS)
+            for name in sorted(filenames):
+                if name.endswith(PRECOMPRESSED_SUFFIXES):
+                    continue
+                path = os.path.relpath(os.path.join(dirpath, name), root).replace(os.sep, '/')
+                if original_path(path) and os.path.exists(os.path.join(root, original_path(path))):
+                    continue
+                assets.append(path)
+    return assets
+
+def resolve_reference(reference, page_path):
+    """Resolve an href/src against the page to a site-relative path, or None for external URLs"""
+    parts = urlsplit(reference)
+    if parts.scheme in ('http', 'https'):
+        if parts.netloc not in SITE_HOSTS:
+            return None
+    elif parts.scheme or parts.netloc or not parts.path:
+        return None
+    if parts.path.startswith('/'):
+        path = parts.path
+    else:
+        path = posixpath.join('/' + posixpath.dirname(page_path), parts.path)
+    return posixpath.normpath(path).lstrip('/')
+
+def rewrite_reference(reference, page_path, mapping):
+    """Swap the file name of an asset reference for its fingerprinted name, keeping the URL style"""
+    path = resolve_reference(reference, page_path)
+    if path is None:
+        return reference
+    source = path if path in mapping else original_path(path)
+    if source not in mapping:
+        return reference
+    parts = urlsplit(reference)
+    # The fingerprint replaces ad-hoc ?v= cache busters; fragments (e.g. #toolbar=1) stay
+    new_path = posixpath.join(posixpath.dirname(parts.path), posixpath.basename(mapping[source]))
+    return parts._replace(path=new_path, query='').geturl()
+
+def rewrite_html(html_content, page_path, mapping):
+    """Rewrite asset references in every tag of a document in one pass"""
+    def rewrite_attribute(match):
+        quote = match.group('value')[0] if match.group('value')[0] in '"\'' else ''
+        value = match.group('value').strip('"\'') if quote else match.group('value')
+        if match.group('name').lower() == 'srcset':
+            candidates = [candidate.strip().split(None, 1) for candidate in value.split(',') if candidate.strip()]
+            value = ', '.join(' '.join([rewrite_reference(candidate[0], page_path, mapping)] + candidate[1:])
+                              for candidate in candidates)
+        else:
+            value = rewrite_reference(value, page_path, mapping)
+        return f"{match.group('name')}{match.group('eq')}{quote}{value}{quote}"
+
+    def rewrite_token(match):
+        if match.group('tag'):
+            return URL_ATTRIBUTE.sub(rewrite_attribute, match.group('tag'))
+        if match.group('raw_open'):
+            return (URL_ATTRIBUTE.sub(rewrite_attribute, match.group('raw_open'))
+                    + match.group('raw_body') + match.group('raw_close'))
+        return match.group(0)
+
+    return HTML_TOKEN.sub(rewrite_token, html_content)
+
+def rewrite_css(css_content, css_path, mapping):
+    """Rewrite url() references so stylesheets point at fingerprinted images and fonts"""
+    def replace(match):
+        quote = match.group('quote')
+        return f"url({quote}{rewrite_reference(match.group('url'), css_path, mapping)}{quote})"
+    return CSS_URL.sub(replace, css_content)
+
+def remove_stale_copies(root, source, keep):
+    """Delete fingerprinted copies of an asset (and their .br/.gz siblings) left behind by earlier runs"""
+    directory = os.path.join(root, posixpath.dirname(source))
+    for name in os.listdir(directory):
+        path = posixpath.join(posixpath.dirname(source), name)
+        copy = strip_precompressed(path)
+        if original_path(copy) == source and copy != keep:
+            os.remove(os.path.join(root, path))
+
+def fingerprint_site(root='.'):
+    """Fingerprint all assets, rewrite every HTML page and return the manifest"""
+    assets = discover_assets(root)
+    mapping = {}
+    manifest = {}
+
+    # Stylesheets may reference other assets, so hash everything else first
+    ordered = [path for path in assets if not path.endswith('.css')] + [path for path in assets if path.endswith('.css')]
+    rewritten = 0
+    # Copies, pages and manifest are committed atomically in one batch (copies first, so
+    # no page ever points at a missing file); old copies go only once nothing refers to them
+    writer = converter.OutputWriter(batch=True)
+    with writer:
+        for source in ordered:
+            with open(os.path.join(root, source), 'rb') as f:
+                data = f.read()
+            if source.endswith('.css'):
+                data = rewrite_css(data.decode('utf-8'), source, mapping).encode('utf-8')
+            digest = content_hash(data)
+            target = fingerprinted_path(source, digest)
+            writer.write(os.path.join(root, target), data)
+            mapping[source] = target
+            manifest[source] = {'path': target, 'sha256': digest, 'size': len(data)}
+
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = sorted(name for name in dirnames if name not in SKIP_DIRS and not name.startswith('.'))
+            for name in sorted(filenames):
+                if not name.endswith('.html'):
+                    continue
+                full_path = os.path.join(dirpath, name)
+                page_path = os.path.relpath(full_path, root).replace(os.sep, '/')
+                with open(full_path, 'r', encoding='utf-8') as f:
+                    html_content = f.read()
+                if writer.write(full_path, rewrite_html(html_content, page_path, mapping)):
+                    rewritten += 1
+
+        writer.write(os.path.join(root, MANIFEST_FILE), json.dumps(manifest, indent=1, sort_keys=True) + '\n')
+
+    for source, target in mapping.items():
+        remove_stale_copies(root, source, target)
+
+    # Pages now reference the fingerprinted names, so precache those instead
+    sw_path = os.path.join(root, service_worker.SERVICE_WORKER_FILE)
+    if os.path.exists(sw_path):
+        converter.OutputWriter().write(sw_path, service_worker.generate_service_worker(root))
+
+    print(f"Fingerprinted {len(manifest)} assets and rewrote {rewritten} pages")
+    return manifest
+
+def main():
+    """Main function for command line usage"""
+    root = sys.argv[1] if len(sys.argv) > 1 else '.'
+    fingerprint_site(root)
+
+if __name__ == "__main__":
+    main()
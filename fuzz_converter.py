@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Markdown Converter Fuzz Harness
+Feeds the converter adversarial markdown (unclosed fences, runs of '*', deep and
+ragged lists, unbalanced brackets...) at growing sizes and fails when conversion
+time grows faster than linearly or blows an absolute limit, fuzzes random
+documents for crashes and unbalanced output, compares the tag structure of a
+hand-picked golden corpus against the stored expectation and checks that every
+real note converts to balanced HTML
+"""
+
+import argparse
+import difflib
+import glob
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from html.parser import HTMLParser
+
+import md_to_html_converter as converter
+
+GOLDEN_FILE = os.path.join('.github', 'converter-golden.json')
+# Selectable with --only: golden structure and note balance are deterministic and
+# never change with new content; wall-clock scaling is neither
+CHECKS = ['golden', 'notes', 'random', 'scaling']
+
+# Each adversarial case is timed at BASE_SIZE and SCALE x BASE_SIZE repetitions; the
+# larger input may take at most SCALE x LINEAR_SLACK as long (linear, with room for noise)
+BASE_SIZE = 1000
+SCALE = 4
+LINEAR_SLACK = 2.5
+# Absolute ceiling for any single input, generous enough for a slow CI runner
+SECONDS_PER_MB = 5.0
+MIN_LIMIT = 0.5
+# A conversion this far over its limit is treated as hung and killed
+HANG_FACTOR = 10
+
+# Tags whose nesting must balance in every conversion
+BLOCK_TAGS = {'p', 'ol', 'ul', 'li', 'h2', 'h3', 'blockquote', 'pre', 'code', 'div',
+              'section', 'strong', 'em', 'a', 'sup'}
+VOID_TAGS = {'br', 'hr', 'img', 'input', 'meta', 'link'}
+STRUCTURE_ATTRIBUTES = ('id', 'class', 'href')
+
+# name -> (unit repeated n times, optional prefix, optional suffix); '{i}' in a unit
+# becomes the repetition's index, e.g. for distinct footnote labels
+ADVERSARIAL_CASES = {
+    'unclosed_fences': ('```\ncode line with **stars** and `ticks`\n', '', ''),
+    'fence_markers_only': ('```', '', ''),
+    'star_run': ('*', 'text ', ''),
+    'unclosed_strong': ('**a ', '', ''),
+    'unclosed_emphasis': ('*a ', '', ''),
+    'alternating_stars': ('** * ', '', ''),
+    'open_brackets': ('[', 'see ', ''),
+    'link_without_close': ('[a](', '', ''),
+    'half_links': ('[text]', '', ''),
+    'footnote_refs': ('[^n{i}] ', '', ''),
+    'repeated_footnote_refs': ('[^n] ', '', ''),
+    'backticks': ('`a ', '', ''),
+    'deep_indentation': ('    * nested item with **bold**\n', '1. item\n', ''),
+    'ragged_indentation': (' ' * 3 + '1. x\n' + ' ' * 7 + '* y\n', '1. top\n', ''),
+    'numbered_items': ('1. item\n\n', '', ''),
+    'list_blank_runs': ('\n', '1. first\n', '2. second\n'),
+    'dash_items': ('- item *em* [l](u)\n', '', ''),
+    'quote_lines': ('> quoted *text*\n', '', ''),
+    'callout_body': ('> body line\n', '> [!NOTE] Title\n', ''),
+    'duplicate_headings': ('## Same heading\n', '', ''),
+    'paragraph_lines': ('plain paragraph line with words\n', '', ''),
+    'blank_paragraphs': ('line\n\n', '', ''),
+    'long_line': ('word ', '', ''),
+    'html_lines': ('<div>raw **html**</div>\n', '', ''),
+    'hash_lines': ('#### not a heading\n', '', ''),
+    'footnote_definitions': ('[^x]: text [^x]\n', 'ref [^x]\n', ''),
+}
+
+# Fragments the random fuzzer stitches together; raw block HTML passes through the
+# converter untouched, so unbalanced tags (or a bare "<word") in the input would only
+# test the input
+FUZZ_FRAGMENTS = [
+    '# ', '## ', '### ', '#### ', '1. ', '12. ', '- ', '* ', '    * ', '       ', '> ', '> [!WARNING] ',
+    '```', '```python', '`', '**', '*', '_', '[', ']', '(', ')', '[^1]', '[^1]: ', '<br>', '<span>',
+    '---', '\n', '\n', '\n\n', ' ', 'word', 'robot', 'https://example.com', '& ', ' < ', '"', "'", 'é', '\t',
+]
+
+# Hand-picked documents whose structure is pinned in GOLDEN_FILE
+GOLDEN_CASES = {
+    'headings': '# Title\n\n## Section\n\n### Sub\n\n## Section\n',
+    'emphasis': 'A **bold** and *em* and **nested *em* bold** and a * lone star and 2 * 3 * 4.\n',
+    'links': 'See [the paper](https://example.com/a) and [**bold link**](/notes/x) and [broken](.\n',
+    'code': 'Inline `a *b* c` code.\n\n```python\nx = 1 < 2 ** 3\n```\n\n```\nunclosed fence\n',
+    'ordered_list': '1. **First**\n    * a\n    * b\n        1. deeper\n2. Second\ncontinued text\n3. Third (*)\n   *aside*\n',
+    'unordered_list': '- one\n- two *em*\n* three\n',
+    'indented_bullets': 'Intro\n\n    * standalone bullet\n    continued\n',
+    'paragraph_merge': '**Paper:** x <br>\n\n**Authors:** y <br>\n\nBody text.\n',
+    'quotes_and_callouts': '> plain quote\n> second line\n\n> [!WARNING] Careful\n> body\n\n> [!TIP]\n',
+    'footnotes': 'Claim[^a] and again[^a] and missing[^zz].\n\n[^a]: Because [^b].\n[^b]: Nested.\n',
+    'rules_and_html': '---\n\n<div class="x">raw</div>\n\n#### not heading\n',
+    'unicode': '## Ünïcödé heading\n\nCafé **naïve** 柳思杨\n',
+}
+
+def adversarial_document(name, size):
+    unit, prefix, suffix = ADVERSARIAL_CASES[name]
+    if '{i}' in unit:
+        return prefix + ''.join(unit.replace('{i}', str(i)) for i in range(size)) + suffix
+    return prefix + unit * size + suffix
+
+def convert_document(markdown_content):
+    """What the site build runs for one note: body conversion plus the full page shell"""
+    converter.render_note(markdown_content, 'Fuzz')
+
+def time_conversion(markdown_content, repeats=3):
+    """Best-of-N wall time, which is the least noisy estimate of the real cost"""
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        convert_document(markdown_content)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def time_limit(markdown_content):
+    return max(MIN_LIMIT, len(markdown_content.encode('utf-8')) / 1_000_000 * SECONDS_PER_MB)
+
+def measure_case(name, base_size=BASE_SIZE):
+    """Time one adversarial case at both sizes; runs in a worker so a hang can be killed"""
+    small = adversarial_document(name, base_size)
+    large = adversarial_document(name, base_size * SCALE)
+    return time_conversion(small), time_conversion(large), len(large.encode('utf-8'))
+
+def check_scaling(base_size=BASE_SIZE):
+    """Fail any adversarial case that grows super-linearly or exceeds its time limit"""
+    failures = []
+    for name in ADVERSARIAL_CASES:
+        large = adversarial_document(name, base_size * SCALE)
+        hard_limit = time_limit(large) * HANG_FACTOR
+        with multiprocessing.Pool(1) as pool:
+            result = pool.apply_async(measure_case, (name, base_size))
+            try:
+                small_time, large_time, large_bytes = result.get(hard_limit)
+            except multiprocessing.TimeoutError:
+                pool.terminate()
+                failures.append(f"{name}: still running after {hard_limit:.1f}s (hang or catastrophic backtracking)")
+                print(f"{name:<24} HUNG")
+                continue
+        # Sub-millisecond timings are noise; only judge growth on measurable work
+        ratio = large_time / max(small_time, 1e-3)
+        status = 'ok'
+        if ratio > SCALE * LINEAR_SLACK and large_time > 0.01:
+            status = 'SUPERLINEAR'
+            failures.append(f"{name}: {SCALE}x input took {ratio:.1f}x as long ({small_time:.4f}s -> {large_time:.4f}s)")
+        if large_time > time_limit(large):
+            status = 'SLOW'
+            failures.append(f"{name}: {large_bytes:,} bytes took {large_time:.2f}s (limit {time_limit(large):.2f}s)")
+        print(f"{name:<24} {large_bytes:>9,} bytes {small_time * 1000:>9.2f}ms {large_time * 1000:>9.2f}ms "
+              f"x{ratio:>5.1f} {status}")
+    return failures
+
+class StructureParser(HTMLParser):
+    """Reduce HTML to its tag skeleton (text dropped) and track tag balance"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.lines = []
+        self.stack = []
+        self.errors = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        shown = ''.join(f' {name}="{attrs[name]}"' for name in STRUCTURE_ATTRIBUTES if attrs.get(name) is not None)
+        self.lines.append('  ' * len(self.stack) + f'<{tag}{shown}>')
+        if tag not in VOID_TAGS:
+            self.stack.append(tag)
+
+    def handle_endtag(self, tag):
+        if tag in VOID_TAGS:
+            return
+        if tag not in self.stack:
+            if tag in BLOCK_TAGS:
+                self.errors.append(f'stray </{tag}>')
+            return
+        while self.stack[-1] != tag:
+            unclosed = self.stack.pop()
+            if unclosed in BLOCK_TAGS:
+                self.errors.append(f'<{unclosed}> closed by </{tag}>')
+        self.stack.pop()
+
+def structure(html_content):
+    """(skeleton lines, balance errors) of a converted body"""
+    parser = StructureParser()
+    parser.feed(html_content)
+    parser.close()
+    errors = parser.errors + [f'unclosed <{tag}>' for tag in parser.stack if tag in BLOCK_TAGS]
+    return parser.lines, errors
+
+def fuzz_random(iterations, seed):
+    """Random fragment soup: no exceptions, no unbalanced tags, no runaway time"""
+    failures = []
+    rng = random.Random(seed)
+    for iteration in range(iterations):
+        document = ''.join(rng.choice(FUZZ_FRAGMENTS) for _ in range(rng.randint(1, 400)))
+        try:
+            start = time.perf_counter()
+            body = converter.convert_markdown_to_html(document)
+            convert_document(document)
+            elapsed = time.perf_counter() - start
+        except Exception as e:
+            failures.append(f"random #{iteration} (seed {seed}): {type(e).__name__}: {e}\n{document!r}")
+            continue
+        _, errors = structure(body)
+        if errors:
+            failures.append(f"random #{iteration} (seed {seed}): {', '.join(errors[:3])}\n{document!r}")
+        if elapsed > time_limit(document):
+            failures.append(f"random #{iteration} (seed {seed}): took {elapsed:.2f}s\n{document!r}")
+    print(f"Fuzzed {iterations} random documents (seed {seed}): {len(failures)} failures")
+    return failures
+
+def check_notes(root):
+    """Every real note converts without errors to balanced HTML
+
+    Only balance is checked: a note's structure changes whenever it is edited, so
+    pinning it would make every new heading (or new note) a failure.
+    """
+    failures = []
+    paths = sorted(glob.glob(os.path.join(root, 'notes', '*.md')))
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            document = f.read()
+        name = os.path.basename(path)
+        try:
+            _, errors = structure(converter.convert_markdown_to_html(document))
+            convert_document(document)
+        except Exception as e:
+            failures.append(f"note {name}: {type(e).__name__}: {e}")
+            continue
+        failures += [f"note {name}: {error}" for error in errors]
+    print(f"Checked {len(paths)} notes for balanced output")
+    return failures
+
+def check_golden(root, update=False):
+    """Compare each golden case's tag skeleton with the stored one, or rewrite the store"""
+    path = os.path.join(root, GOLDEN_FILE)
+    current = {}
+    failures = []
+    for name, document in GOLDEN_CASES.items():
+        skeleton, errors = structure(converter.convert_markdown_to_html(document))
+        current[name] = skeleton
+        failures += [f"golden {name}: {error}" for error in errors]
+
+    if update:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(current, f, indent=1, sort_keys=True, ensure_ascii=False)
+            f.write('\n')
+        print(f"Wrote {len(current)} golden structures to '{path}'")
+        return failures
+
+    if not os.path.exists(path):
+        return failures + [f"no golden corpus at '{path}'; create it with --update-golden"]
+    with open(path, 'r', encoding='utf-8') as f:
+        expected = json.load(f)
+    for name, skeleton in current.items():
+        if name not in expected:
+            failures.append(f"golden {name}: not in the corpus; review it and run --update-golden")
+        elif expected[name] != skeleton:
+            diff = '\n'.join(difflib.unified_diff(expected[name], skeleton, 'expected', 'actual', lineterm='', n=2))
+            failures.append(f"golden {name}: structure changed\n{diff}")
+    for name in expected.keys() - current.keys():
+        failures.append(f"golden {name}: case no longer exists; run --update-golden")
+    print(f"Compared {len(current)} golden structures")
+    return failures
+
+def main():
+    """Main function for command line usage"""
+    parser = argparse.ArgumentParser(description="Fuzz the markdown converter and gate on linear-time conversion")
+    parser.add_argument('root', nargs='?', default='.', help="site root with notes/ and the golden corpus (default: .)")
+    parser.add_argument('--iterations', type=int, default=300, help="random documents to fuzz (default: 300)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed (default: 0)")
+    parser.add_argument('--base-size', type=int, default=BASE_SIZE,
+                        help=f"repetitions of each adversarial unit at the smaller size (default: {BASE_SIZE})")
+    parser.add_argument('--update-golden', action='store_true', help="rewrite the golden corpus from current output")
+    parser.add_argument('--only', action='append', choices=CHECKS, metavar='CHECK',
+                        help=f"run just this check, repeatable ({', '.join(CHECKS)}; default: all)")
+    args = parser.parse_args()
+    checks = args.only or CHECKS
+
+    failures = []
+    if 'golden' in checks:
+        failures += check_golden(args.root, args.update_golden)
+    if 'notes' in checks:
+        failures += check_notes(args.root)
+    if 'random' in checks:
+        failures += fuzz_random(args.iterations, args.seed)
+    if 'scaling' in checks:
+        failures += check_scaling(args.base_size)
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
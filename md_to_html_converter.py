@@ -7,9 +7,20 @@ Converts markdown files to HTML with comprehensive SEO elements for better Googl
 import re
 import sys
 import os
-from datetime import datetime
+import hashlib
+import html
+import tempfile
+from datetime import datetime, timezone
 import urllib.parse
 
+PAPER_SECTION = re.compile(r'^#{1,3}\s+About the Paper\s*$', re.MULTILINE | re.IGNORECASE)
+# The **Field:** lines extract_paper_info reads, one per line
+PAPER_FIELD = re.compile(r'^\*\*(?:Paper|Authors|Journal|Published|DOI):\*\*.*\n?', re.MULTILINE)
+
+def strip_title_heading(markdown_content):
+    """Drop the H1 heading since the page template already renders the title"""
+    return re.sub(r'^# .+?\n', '', markdown_content, count=1, flags=re.MULTILINE)
+
 def extract_paper_info(markdown_content):
     """Extract paper information from markdown content"""
     paper_info = {
@@ -49,6 +60,23 @@ def extract_paper_info(markdown_content):
     
     return paper_info
 
+def clean_field(value):
+    """Remove the trailing <br> markup notes use to force line breaks"""
+    return re.sub(r'\s*<br\s*/?>\s*$', '', value or '').strip()
+
+def normalize_doi(doi):
+    """Strip resolver prefixes so the same DOI always compares equal"""
+    doi = doi.strip().rstrip('.')
+    doi = re.sub(r'^(?:https?://(?:dx\.)?doi\.org/|doi:\s*)', '', doi, flags=re.IGNORECASE)
+    return doi.lower()
+
+def extract_description(markdown_content):
+    """Use the first substantial prose line as the page description"""
+    for line in markdown_content.split('\n'):
+        if line.strip() and not line.startswith('#') and not line.startswith('**') and len(line.strip()) > 20:
+            return line.strip()[:200] + "..." if len(line.strip()) > 200 else line.strip()
+    return ""
+
 def generate_seo_meta_tags(title, description, keywords, author="Siyang Liu", domain="https://lsy641.github.io"):
     """Generate comprehensive SEO meta tags"""
     
@@ -372,6 +400,467 @@ def generate_css():
     </style>
     """
 
+def heading_text(markdown_heading):
+    """Plain text of a heading with links, emphasis and code markup removed"""
+    text = re.sub(r'\[([^\]]+)\]\([^)]+\)', r'\1', markdown_heading)
+    return re.sub(r'[*_`]', '', text).strip()
+
+def slugify_heading(markdown_heading, used_ids):
+    """Stable, unique anchor id for a heading, e.g. 'Key Points' -> 'key-points'
+
+    used_ids is a set of taken ids, or (as convert_markdown_to_html passes it) a dict
+    mapping each taken id to the next suffix worth trying, so repeats don't rescan from -2.
+    """
+    slug = re.sub(r'[^a-z0-9]+', '-', heading_text(markdown_heading).lower()).strip('-') or 'section'
+    heading_id = slug
+    if isinstance(used_ids, set):
+        suffix = 2
+        while heading_id in used_ids:
+            heading_id = f'{slug}-{suffix}'
+            suffix += 1
+        used_ids.add(heading_id)
+        return heading_id
+    if heading_id in used_ids:
+        suffix = used_ids[slug]
+        while f'{slug}-{suffix}' in used_ids:
+            suffix += 1
+        heading_id = f'{slug}-{suffix}'
+        used_ids[slug] = suffix + 1
+    used_ids[heading_id] = 2
+    return heading_id
+
+def generate_toc_html(toc):
+    """Render the table of contents collected while converting headings"""
+    lines = ['<nav class="toc" aria-label="Table of contents">', '    <h2>Contents</h2>', '    <ul>']
+    in_sublist = False
+    for index, entry in enumerate(toc):
+        link = f'<a href="#{entry["id"]}">{entry["title"]}</a>'
+        if entry['level'] == 3 and index > 0:
+            if not in_sublist:
+                lines.append('        <ul>')
+                in_sublist = True
+            lines.append(f'            <li>{link}</li>')
+            continue
+        if in_sublist:
+            lines.append('        </ul>')
+            in_sublist = False
+        if index > 0:
+            lines.append('    </li>')
+        lines.append(f'    <li>{link}')
+    if in_sublist:
+        lines.append('        </ul>')
+    if toc:
+        lines.append('    </li>')
+    lines += ['    </ul>', '</nav>']
+    return '\n'.join(lines)
+
+FOOTNOTES_SECTION = re.compile(r'\n?<section class="footnotes">.*?</section>\s*$', re.DOTALL)
+
+def split_lazy_sections(html_content, fragment_prefix, fragments):
+    """Keep the first section inline and move each later H2 section into a fragment file
+
+    The footnotes stay inline after the placeholders, so note links resolve without
+    loading the last section.
+    """
+    footnotes = FOOTNOTES_SECTION.search(html_content)
+    if footnotes:
+        html_content = html_content[:footnotes.start()]
+    parts = re.split(r'(?=<h2 id=")', html_content)
+    if len(parts) <= 2:
+        return html_content + (footnotes.group(0) if footnotes else '')
+    # A note's H1 becomes an empty H2 section, so the inline part runs through the
+    # first section that has content of its own
+    first = 1
+    while first < len(parts) - 1 and not re.sub(r'<h2 id="[^"]+">.*?</h2>', '', parts[first]).strip():
+        first += 1
+    inline = ''.join(parts[:first + 1])
+    if first + 1 >= len(parts):
+        return html_content + (footnotes.group(0) if footnotes else '')
+    placeholders = []
+    for number, section in enumerate(parts[first + 1:], start=2):
+        url = f'{fragment_prefix}{number}.html'
+        # Footnote back-links jump to references inside the section, so those load it too
+        anchors = ' '.join(re.findall(r'<(?:h[23]|sup)\b[^>]*? id="([^"]+)"', section))
+        label = re.match(r'<h2 id="[^"]+">(.*?)</h2>', section).group(1)
+        fragments.append((url, section))
+        placeholders.append(f'<section class="lazy-section" data-lazy-src="{url}" data-anchors="{anchors}">\n'
+                            f'<p><a href="{url}">Continue reading: {label}</a></p>\n</section>')
+    return inline + '\n' + '\n'.join(placeholders) + (footnotes.group(0) if footnotes else '')
+
+# Loads split sections as the reader approaches them, or straight away (in order) when
+# a TOC link or URL fragment points into a section that has not been fetched yet
+LAZY_SECTIONS_SCRIPT = """<script>
+        (function () {
+            var sections = Array.prototype.slice.call(document.querySelectorAll('section[data-lazy-src]'));
+            function load(section) {
+                if (!section.loading) {
+                    section.loading = fetch(section.getAttribute('data-lazy-src')).then(function (response) {
+                        return response.text();
+                    }).then(function (html) {
+                        section.innerHTML = html;
+                        section.removeAttribute('data-lazy-src');
+                    });
+                }
+                return section.loading;
+            }
+            function loadThrough(id) {
+                for (var i = 0; i < sections.length; i++) {
+                    if ((' ' + sections[i].getAttribute('data-anchors') + ' ').indexOf(' ' + id + ' ') !== -1) {
+                        Promise.all(sections.slice(0, i + 1).map(load)).then(function () {
+                            var target = document.getElementById(id);
+                            if (target) target.scrollIntoView();
+                        });
+                        return;
+                    }
+                }
+            }
+            function onHash() {
+                if (location.hash.length > 1) loadThrough(decodeURIComponent(location.hash.slice(1)));
+            }
+            if ('IntersectionObserver' in window) {
+                var observer = new IntersectionObserver(function (entries) {
+                    entries.forEach(function (entry) {
+                        if (entry.isIntersecting) {
+                            observer.unobserve(entry.target);
+                            load(entry.target);
+                        }
+                    });
+                }, { rootMargin: '1000px 0px' });
+                sections.forEach(function (section) { observer.observe(section); });
+            } else {
+                sections.forEach(load);
+            }
+            window.addEventListener('hashchange', onHash);
+            onHash();
+        })();
+    </script>"""
+
+# Markdown rules are indexed so each line (or inline run) only tries the rules that
+# could match it: block rules by the first non-blank character of a line, inline
+# rules by the character that opens them. Lines no rule claims are paragraph text.
+# Extensions register through the same functions as the built-in syntax below.
+BLOCK_RULES = {}
+INLINE_RULES = {}
+DOCUMENT_HOOKS = []
+INLINE_TRIGGER = re.compile(r'(?!)')
+
+ORDERED_ITEM = re.compile(r'^\d+\. ')
+HEADING = re.compile(r'^(#{1,3}) (.*?)$')
+FOOTNOTE_DEFINITION = re.compile(r'^\[\^([^\]\s]+)\]:\s*(.*)$')
+CALLOUT = re.compile(r'^>\s*\[!(note|tip|info|important|warning|caution)\]\s*(.*)$', re.IGNORECASE)
+CALLOUT_CLASSES = {'note': 'note-info', 'tip': 'note-info', 'info': 'note-info',
+                   'important': 'warning', 'warning': 'warning', 'caution': 'warning'}
+
+def register_block_rule(name, triggers, handler, priority=100):
+    """Register handler(lines, i, ctx) -> (html, next_i) for lines starting with any trigger character
+
+    Rules for a character are tried in priority order (lowest first); a handler returns
+    None to pass the line on. Registering an existing name replaces that rule.
+    """
+    for trigger in triggers:
+        rules = [rule for rule in BLOCK_RULES.get(trigger, []) if rule[1] != name]
+        BLOCK_RULES[trigger] = sorted(rules + [(priority, name, handler)], key=lambda rule: rule[0])
+
+def register_inline_rule(name, triggers, pattern, render, priority=100):
+    """Register render(match, ctx) -> html for a pattern that opens with one of the trigger characters"""
+    global INLINE_TRIGGER
+    pattern = re.compile(pattern) if isinstance(pattern, str) else pattern
+    for trigger in triggers:
+        rules = [rule for rule in INLINE_RULES.get(trigger, []) if rule[1] != name]
+        INLINE_RULES[trigger] = sorted(rules + [(priority, name, pattern, render)], key=lambda rule: rule[0])
+    INLINE_TRIGGER = re.compile('[' + ''.join(re.escape(trigger) for trigger in sorted(INLINE_RULES)) + ']')
+
+def register_document_hook(name, hook):
+    """Register hook(blocks, ctx), run after the block pass, e.g. to append collected footnotes"""
+    DOCUMENT_HOOKS[:] = [entry for entry in DOCUMENT_HOOKS if entry[0] != name] + [(name, hook)]
+
+def registered_rules():
+    """Every registered rule as (kind, trigger, priority, name, pattern, function), e.g. for build cache keys"""
+    rules = [('block', trigger, priority, name, None, handler)
+             for trigger, entries in sorted(BLOCK_RULES.items()) for priority, name, handler in entries]
+    rules += [('inline', trigger, priority, name, pattern.pattern, render)
+              for trigger, entries in sorted(INLINE_RULES.items()) for priority, name, pattern, render in entries]
+    rules += [('document', None, None, name, None, hook) for name, hook in DOCUMENT_HOOKS]
+    return rules
+
+def render_inline(text, ctx):
+    """Apply inline rules, jumping straight from one trigger character to the next"""
+    parts = []
+    pos = 0
+    while True:
+        trigger = INLINE_TRIGGER.search(text, pos)
+        if not trigger:
+            parts.append(text[pos:])
+            return ''.join(parts)
+        start = trigger.start()
+        parts.append(text[pos:start])
+        for _, _, pattern, render in INLINE_RULES[text[start]]:
+            match = pattern.match(text, start)
+            if match:
+                parts.append(render(match, ctx))
+                pos = match.end()
+                break
+        else:
+            parts.append(text[start])
+            pos = start + 1
+
+def leading_spaces(line):
+    return len(line) - len(line.lstrip(' '))
+
+def heading_block(lines, i, ctx):
+    """# to ### headings with stable ids; H1 becomes H2 since the page header carries the title"""
+    match = HEADING.match(lines[i])
+    if not match:
+        return None
+    level = 3 if len(match.group(1)) == 3 else 2
+    heading_id = slugify_heading(match.group(2), ctx['used_ids'])
+    if ctx['toc'] is not None:
+        ctx['toc'].append({'level': level, 'id': heading_id, 'title': heading_text(match.group(2))})
+    return f'<h{level} id="{heading_id}">{render_inline(match.group(2), ctx)}</h{level}>', i + 1
+
+def fenced_code_block(lines, i, ctx):
+    """``` fenced code, kept verbatim (escaped) with an optional language class"""
+    opening = lines[i].strip()
+    if not opening.startswith('```'):
+        return None
+    if len(opening) > 6 and opening.endswith('```'):
+        return f'<pre><code>{html.escape(opening[3:-3], quote=False)}</code></pre>', i + 1
+    language = opening[3:].strip()
+    code = []
+    i += 1
+    while i < len(lines) and not lines[i].strip().startswith('```'):
+        code.append(lines[i])
+        i += 1
+    attributes = f' class="language-{html.escape(language)}"' if language else ''
+    return f'<pre><code{attributes}>{html.escape(chr(10).join(code), quote=False)}</code></pre>', i + 1
+
+def ordered_list_block(lines, i, ctx):
+    """Numbered list; deeper-indented '* ' lines form each item's sub-list, other lines continue the text"""
+    if not ORDERED_ITEM.match(lines[i].strip()):
+        return None
+    indent = leading_spaces(lines[i])
+    items = []
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.strip()
+        if not stripped:
+            # A blank line only continues the list when another item follows it
+            j = i
+            while j < len(lines) and not lines[j].strip():
+                j += 1
+            if j < len(lines) and ORDERED_ITEM.match(lines[j].strip()) and leading_spaces(lines[j]) <= indent:
+                i = j
+                continue
+            break
+        deeper = leading_spaces(line) > indent
+        if not deeper and ORDERED_ITEM.match(stripped):
+            items.append({'text': [ORDERED_ITEM.sub('', stripped, count=1)], 'children': []})
+        elif not deeper and stripped.startswith(('- ', '#')):
+            break
+        elif deeper and stripped.startswith('* '):
+            items[-1]['children'].append([stripped[2:]])
+        elif deeper and items[-1]['children']:
+            items[-1]['children'][-1].append(stripped)
+        else:
+            items[-1]['text'].append(stripped)
+        i += 1
+
+    html_lines = ['<ol>']
+    for item in items:
+        html_lines.append(f"<li>{render_inline(' '.join(item['text']), ctx)}")
+        if item['children']:
+            html_lines.append('<ul>')
+            html_lines += [f"<li>{render_inline(' '.join(child), ctx)}</li>" for child in item['children']]
+            html_lines.append('</ul>')
+        html_lines.append('</li>')
+    html_lines.append('</ol>')
+    return '\n'.join(html_lines), i
+
+def unordered_list_block(lines, i, ctx):
+    """Consecutive '- ' (or shallow '* ') items"""
+    def is_item(line):
+        stripped = line.strip()
+        return stripped.startswith('- ') or (stripped.startswith('* ') and leading_spaces(line) < 4)
+    if not is_item(lines[i]):
+        return None
+    html_lines = ['<ul>']
+    while i < len(lines) and is_item(lines[i]):
+        html_lines.append(f'<li>{render_inline(lines[i].strip()[2:], ctx)}</li>')
+        i += 1
+    html_lines.append('</ul>')
+    return '\n'.join(html_lines), i
+
+def indented_bullet_block(lines, i, ctx):
+    """A standalone indented '* ' bullet (and its continuation lines) becomes a paragraph"""
+    if not (lines[i].startswith('    ') and lines[i].strip().startswith('* ')):
+        return None
+    content = [lines[i].strip()[2:]]
+    i += 1
+    while i < len(lines) and lines[i].startswith('    ') and not lines[i].strip().startswith('* '):
+        content.append(lines[i].strip())
+        i += 1
+    return f"<p>{render_inline(' '.join(content), ctx)}</p>", i
+
+def horizontal_rule_block(lines, i, ctx):
+    if lines[i].strip() != '---':
+        return None
+    return '<hr>', i + 1
+
+def blockquote_block(lines, i, ctx):
+    """Consecutive '> ' lines form one quote"""
+    quoted = []
+    while i < len(lines) and lines[i].lstrip().startswith('>'):
+        quoted.append(render_inline(re.sub(r'^\s*> ?', '', lines[i]), ctx))
+        i += 1
+    return '<blockquote>' + '\n'.join(quoted) + '</blockquote>', i
+
+def html_block(lines, i, ctx):
+    """Lines that already start with a tag pass through, with inline markdown still applied"""
+    return render_inline(lines[i].strip(), ctx), i + 1
+
+def callout_block(lines, i, ctx):
+    """Callouts: '> [!NOTE] Optional title' followed by quoted lines, styled like the note/warning boxes"""
+    match = CALLOUT.match(lines[i].strip())
+    if not match:
+        return None
+    kind = match.group(1).lower()
+    title = render_inline(match.group(2), ctx) if match.group(2) else kind.capitalize()
+    body = []
+    i += 1
+    while i < len(lines) and lines[i].lstrip().startswith('>'):
+        body.append(re.sub(r'^\s*> ?', '', lines[i]))
+        i += 1
+    content = render_inline('\n'.join(line for line in body if line.strip()), ctx)
+    return (f'<div class="{CALLOUT_CLASSES[kind]}" role="note">\n<p><strong>{title}</strong></p>\n'
+            + (f'<p>{content}</p>\n' if content else '') + '</div>'), i
+
+def footnote_definition_block(lines, i, ctx):
+    """'[^label]: text' (indented lines continue it); rendered at the end of the document"""
+    match = FOOTNOTE_DEFINITION.match(lines[i].strip())
+    if not match:
+        return None
+    text = [match.group(2)]
+    i += 1
+    while i < len(lines) and lines[i].startswith('    ') and lines[i].strip():
+        text.append(lines[i].strip())
+        i += 1
+    ctx.setdefault('footnotes', {})[match.group(1)] = ' '.join(text)
+    return '', i
+
+def footnote_id(label):
+    return re.sub(r'[^\w-]+', '-', label)
+
+# References are numbered once every definition is known (they usually come first), so
+# the inline pass leaves a placeholder that append_footnotes resolves
+FOOTNOTE_PLACEHOLDER = re.compile('\x00fn(\\d+)\x00')
+
+def render_footnote_reference(match, ctx):
+    references = ctx.setdefault('footnote_references', [])
+    references.append((match.group(1), match.group(0)))
+    return f'\x00fn{len(references) - 1}\x00'
+
+def append_footnotes(blocks, ctx):
+    """Number defined footnotes in order of first reference and list them after the body
+
+    References to labels without a definition stay literal text, so the numbers always
+    match the list positions.
+    """
+    references = ctx.get('footnote_references', [])
+    definitions = ctx.get('footnotes', {})
+    numbers = {}
+    first_reference = {}
+    items = []
+    scanned = 0
+    # Rendering a footnote may reference another one, which extends the references
+    while scanned < len(references):
+        label, _ = references[scanned]
+        if label in definitions and label not in numbers:
+            numbers[label] = len(numbers) + 1
+            first_reference[label] = scanned
+            items.append(f'<li id="fn-{footnote_id(label)}">{render_inline(definitions[label], ctx)} '
+                         f'<a href="#fnref-{footnote_id(label)}" aria-label="Back to reference">&#8617;</a></li>')
+        scanned += 1
+
+    def resolve(match):
+        index = int(match.group(1))
+        label, source = references[index]
+        if label not in numbers:
+            return html.escape(source, quote=False)
+        anchor = f' id="fnref-{footnote_id(label)}"' if first_reference[label] == index else ''
+        return f'<sup class="footnote-ref"{anchor}><a href="#fn-{footnote_id(label)}">{numbers[label]}</a></sup>'
+
+    if items:
+        blocks.append('<section class="footnotes">\n<hr>\n<ol>\n' + '\n'.join(items) + '\n</ol>\n</section>')
+    if references:
+        blocks[:] = [FOOTNOTE_PLACEHOLDER.sub(resolve, block) for block in blocks]
+
+def render_link(match, ctx):
+    return f'<a href="{match.group(2)}" rel="noopener" target="_blank">{render_inline(match.group(1), ctx)}</a>'
+
+register_block_rule('heading', '#', heading_block)
+register_block_rule('fenced_code', '`', fenced_code_block)
+register_block_rule('ordered_list', '0123456789', ordered_list_block)
+register_block_rule('horizontal_rule', '-', horizontal_rule_block, priority=50)
+register_block_rule('unordered_list', '-*', unordered_list_block)
+register_block_rule('indented_bullet', '*', indented_bullet_block)
+register_block_rule('blockquote', '>', blockquote_block)
+register_block_rule('html', '<', html_block)
+
+register_inline_rule('code', '`', r'`([^`]+)`',
+                     lambda match, ctx: f'<code>{html.escape(match.group(1), quote=False)}</code>')
+# Bodies stop at the next delimiter they cannot contain, so an opener without a closer
+# fails after a short scan instead of searching the rest of the paragraph
+register_inline_rule('strong', '*', r'\*\*(?=\S)((?:[^*]|\*(?!\*))+?\**)(?<=\S)\*\*',
+                     lambda match, ctx: f'<strong>{render_inline(match.group(1), ctx)}</strong>', priority=50)
+register_inline_rule('emphasis', '*', r'\*(?=\S)([^*]+?)(?<=\S)\*',
+                     lambda match, ctx: f'<em>{render_inline(match.group(1), ctx)}</em>')
+register_inline_rule('link', '[', r'\[([^\[\]]+)\]\(([^()\s]+)\)', render_link)
+
+# Extensions: callouts and footnotes use the same registry as the core syntax
+register_block_rule('callout', '>', callout_block, priority=50)
+register_block_rule('footnote_definition', '[', footnote_definition_block)
+register_inline_rule('footnote_reference', '[', r'\[\^([^\[\]\s]+)\](?!:)', render_footnote_reference, priority=50)
+register_document_hook('footnotes', append_footnotes)
+
+def merge_paragraphs(run):
+    """One block from a run whose neighbours close and open a <p>, joined in a single pass"""
+    if len(run) == 1:
+        return run[0]
+    inner = [block[len('<p>'):-len('</p>')] for block in run[1:-1]]
+    return '\n'.join([run[0][:-len('</p>')]] + inner + [run[-1][len('<p>'):]])
+
+def convert_markdown_to_html(markdown_content, toc=None):
+    """Convert markdown body content to HTML fragments, collecting headings into toc if given"""
+    ctx = {'toc': toc, 'used_ids': {}}
+    # NUL is reserved for the converter's own placeholders; CommonMark replaces it too
+    lines = markdown_content.replace('\x00', '\ufffd').split('\n')
+    # Runs of blocks to merge; paragraphs that follow each other (even across blank lines) share one <p>
+    runs = []
+    i = 0
+    while i < len(lines):
+        stripped = lines[i].strip()
+        if not stripped:
+            i += 1
+            continue
+        for _, _, handler in BLOCK_RULES.get(stripped[0], ()):
+            result = handler(lines, i, ctx)
+            if result:
+                block, i = result
+                break
+        else:
+            block, i = f'<p>{render_inline(stripped, ctx)}</p>', i + 1
+        if not block:
+            continue
+        if runs and runs[-1][-1].endswith('</p>') and block.startswith('<p>'):
+            runs[-1].append(block)
+        else:
+            runs.append([block])
+
+    blocks = [merge_paragraphs(run) for run in runs]
+    for _, hook in DOCUMENT_HOOKS:
+        hook(blocks, ctx)
+    return '\n'.join(blocks)
+
 def markdown_to_html(markdown_content, title="Document", author="Siyang Liu", domain="https://lsy641.github.io"):
     """Convert markdown content to SEO-optimized HTML"""
     
@@ -379,12 +868,7 @@ def markdown_to_html(markdown_content, title="Document", author="Siyang Liu", do
     paper_info = extract_paper_info(markdown_content)
     
     # Generate description from content
-    lines = markdown_content.split('\n')
-    description = ""
-    for line in lines:
-        if line.strip() and not line.startswith('#') and not line.startswith('**') and len(line.strip()) > 20:
-            description = line.strip()[:200] + "..." if len(line.strip()) > 200 else line.strip()
-            break
+    description = extract_description(markdown_content)
     
     # Generate keywords
     keywords = "AI in robotics, embodied AI, robot learning, human-robot interaction, research notes, academic analysis"
@@ -403,141 +887,7 @@ def markdown_to_html(markdown_content, title="Document", author="Siyang Liu", do
     css = generate_css()
     
     # Convert markdown to HTML
-    html_content = markdown_content
-    
-    # Headers (skip H1 since we have it in the header)
-    html_content = re.sub(r'^### (.*?)$', r'<h3>\1</h3>', html_content, flags=re.MULTILINE)
-    html_content = re.sub(r'^## (.*?)$', r'<h2>\1</h2>', html_content, flags=re.MULTILINE)
-    # Convert H1 to H2 to avoid duplication
-    html_content = re.sub(r'^# (.*?)$', r'<h2>\1</h2>', html_content, flags=re.MULTILINE)
-    
-    # Bold and italic
-    html_content = re.sub(r'\*\*(.*?)\*\*', r'<strong>\1</strong>', html_content)
-    html_content = re.sub(r'\*(.*?)\*', r'<em>\1</em>', html_content)
-    
-    # Links with proper attributes
-    html_content = re.sub(r'\[([^\]]+)\]\(([^)]+)\)', r'<a href="\2" rel="noopener" target="_blank">\1</a>', html_content)
-    
-    # Code blocks
-    html_content = re.sub(r'```(.*?)```', r'<pre><code>\1</code></pre>', html_content, flags=re.DOTALL)
-    html_content = re.sub(r'`([^`]+)`', r'<code>\1</code>', html_content)
-    
-    # Lists - Enhanced approach for complex nested structures
-    lines = html_content.split('\n')
-    processed_lines = []
-    i = 0
-    
-    while i < len(lines):
-        line = lines[i]
-        line_stripped = line.strip()
-        
-        # Handle ordered lists (1. item)
-        if re.match(r'^\d+\. ', line_stripped):
-            processed_lines.append('<ol>')
-            
-            # Process all consecutive ordered list items
-            while i < len(lines) and re.match(r'^\d+\. ', lines[i].strip()):
-                content = re.sub(r'^\d+\. ', '', lines[i].strip())
-                processed_lines.append(f'<li>{content}')
-                
-                # Look for nested content (indented with spaces)
-                j = i + 1
-                nested_content = []
-                while j < len(lines) and lines[j].startswith('    ') and lines[j].strip().startswith('* '):
-                    nested_item = lines[j].strip()[2:]  # Remove '* '
-                    
-                    # Collect all continuation lines for this nested item
-                    nested_text = [nested_item]
-                    k = j + 1
-                    while k < len(lines) and lines[k].startswith('    ') and not lines[k].strip().startswith('* '):
-                        nested_text.append(lines[k].strip())
-                        k += 1
-                    
-                    # Join the nested content
-                    complete_nested = ' '.join(nested_text)
-                    nested_content.append(f'<li>{complete_nested}</li>')
-                    j = k
-                
-                # Also look for any continuation text that belongs to the main list item
-                continuation_text = []
-                j = i + 1
-                while j < len(lines) and not lines[j].strip().startswith(('1. ', '2. ', '3. ', '4. ', '5. ', '6. ', '7. ', '8. ', '9. ')) and not lines[j].strip().startswith('- ') and not lines[j].strip().startswith('##') and not lines[j].strip().startswith('###') and lines[j].strip() != '':
-                    if not lines[j].startswith('    '):  # Not nested content
-                        continuation_text.append(lines[j].strip())
-                    j += 1
-                
-                if continuation_text:
-                    # Add continuation text to the current list item
-                    content += ' ' + ' '.join(continuation_text)
-                    # Update the list item with the combined content
-                    processed_lines[-1] = f'<li>{content}'
-                
-                if nested_content:
-                    processed_lines.append('<ul>')
-                    processed_lines.extend(nested_content)
-                    processed_lines.append('</ul>')
-                    i = j - 1  # Adjust index
-                
-                processed_lines.append('</li>')
-                i += 1
-            
-            processed_lines.append('</ol>')
-            continue
-        
-        # Handle unordered lists (- item)
-        elif line_stripped.startswith('- '):
-            processed_lines.append('<ul>')
-            
-            # Process all consecutive unordered list items
-            while i < len(lines) and lines[i].strip().startswith('- '):
-                content = lines[i].strip()[2:]  # Remove '- '
-                processed_lines.append(f'<li>{content}</li>')
-                i += 1
-            
-            processed_lines.append('</ul>')
-            continue
-        
-        # Handle standalone indented bullet points (* item) - convert to paragraphs
-        elif line.startswith('    ') and line_stripped.startswith('* '):
-            content = line_stripped[2:]  # Remove '* '
-            
-            # Handle multi-line content for this bullet point
-            full_content = [content]
-            j = i + 1
-            while j < len(lines) and lines[j].startswith('    ') and not lines[j].strip().startswith('* '):
-                # This is continuation of the same bullet point
-                full_content.append(lines[j].strip())
-                j += 1
-            
-            # Join all content and create a single paragraph
-            complete_content = ' '.join(full_content)
-            processed_lines.append(f'<p>{complete_content}</p>')
-            i = j  # Skip the lines we've already processed
-            continue
-        
-        # Regular line
-        else:
-            processed_lines.append(line)
-            i += 1
-    
-    html_content = '\n'.join(processed_lines)
-    
-    # Paragraphs
-    lines = html_content.split('\n')
-    for i, line in enumerate(lines):
-        line = line.strip()
-        if line and not line.startswith('<') and not line.startswith('#'):
-            lines[i] = f'<p>{line}</p>'
-    html_content = '\n'.join(lines)
-    
-    # Horizontal rules
-    html_content = re.sub(r'^---$', r'<hr>', html_content, flags=re.MULTILINE)
-    
-    # Blockquotes
-    html_content = re.sub(r'^> (.*?)$', r'<blockquote>\1</blockquote>', html_content, flags=re.MULTILINE)
-    
-    # Clean up multiple consecutive p tags
-    html_content = re.sub(r'</p>\s*<p>', '\n', html_content)
+    html_content = convert_markdown_to_html(markdown_content)
     
     # Generate filename for URL
     filename = title.lower().replace(' ', '-').replace(':', '').replace('(', '').replace(')', '')
@@ -582,17 +932,33 @@ def markdown_to_html(markdown_content, title="Document", author="Siyang Liu", do
     
     return html_doc
 
-def generate_html_content(markdown_content, title, description, keywords, author, paper_url=None, paper_title=None, paper_authors=None, paper_journal=None, paper_date=None, paper_doi=None):
+def generate_html_content(markdown_content, title, description, keywords, author, paper_url=None, paper_title=None, paper_authors=None, paper_journal=None, paper_date=None, paper_doi=None, split_threshold=None, fragment_prefix=None, fragments=None, modified=None, page_url=None):
     """Generate complete HTML content with modern styling"""
     
     # Convert markdown to HTML
-    html_content = convert_markdown_to_html(markdown_content)
-    
-    # Generate current date for meta tags
-    current_date = datetime.now().strftime("%Y-%m-%dT%H:%M:%S+00:00")
-    
-    # Create filename for the note
-    note_filename = title.lower().replace(' ', '-').replace(':', '').replace('(', '').replace(')', '').replace(',', '').replace('.', '')
+    toc = []
+    html_content = convert_markdown_to_html(markdown_content, toc)
+    toc_html = generate_toc_html(toc) if len(toc) >= 3 else ''
+    
+    # Long notes keep their first section inline and fetch the rest on demand
+    lazy_script = ''
+    if split_threshold and fragments is not None and len(html_content.encode('utf-8')) > split_threshold:
+        html_content = split_lazy_sections(html_content, fragment_prefix, fragments)
+        if fragments:
+            lazy_script = LAZY_SECTIONS_SCRIPT
+    
+    # Date for meta tags; a fixed modification time keeps re-renders byte-identical
+    modified = modified or datetime.now(timezone.utc)
+    current_date = modified.strftime("%Y-%m-%dT%H:%M:%S+00:00")
+    
+    # Published URL of the note; callers that know the output file pass it, since the
+    # page is served from its file name, not from its title
+    if page_url is None:
+        note_filename = title.lower().replace(' ', '-').replace(':', '').replace('(', '').replace(')', '').replace(',', '').replace('.', '')
+        page_url = f'https://lsy641.github.io/notes/{note_filename}'
+    
+    # Notes with their own "About the Paper" section already show the metadata
+    show_paper_block = not PAPER_SECTION.search(markdown_content)
     
     # Generate HTML template with modern styling
     html_template = f'''<!DOCTYPE html>
@@ -616,7 +982,7 @@ def generate_html_content(markdown_content, title, description, keywords, author
     <meta property="og:title" content="{title} - Research Notes | Siyang Liu" />
     <meta property="og:description" content="{description}" />
     <meta property="og:type" content="article" />
-    <meta property="og:url" content="https://lsy641.github.io/notes/{note_filename}" />
+    <meta property="og:url" content="{page_url}" />
     <meta property="og:image" content="https://lsy641.github.io/images/profile.jpg" />
     <meta property="og:image:width" content="1200" />
     <meta property="og:image:height" content="630" />
@@ -637,7 +1003,7 @@ def generate_html_content(markdown_content, title, description, keywords, author
     <meta name="twitter:creator" content="@liusiyang_641" />
     
     <!-- Canonical URL -->
-    <link rel="canonical" href="https://lsy641.github.io/notes/{note_filename}" />
+    <link rel="canonical" href="{page_url}" />
     
     <!-- Academic Profile Links -->
     <link rel="author" href="https://scholar.google.com/citations?user=2OjUAPUAAAAJ" />
@@ -676,7 +1042,7 @@ def generate_html_content(markdown_content, title, description, keywords, author
         "dateModified": "{current_date}",
         "mainEntityOfPage": {{
             "@type": "WebPage",
-            "@id": "https://lsy641.github.io/notes/{note_filename}"
+            "@id": "{page_url}"
         }},
         "about": [
             {{"@type": "Thing", "name": "Research Notes"}}, 
@@ -875,6 +1241,24 @@ def generate_html_content(markdown_content, title, description, keywords, author
             font-size: 0.9em;
             color: #666;
         }}
+        .toc {{
+            background-color: #f8f9fa;
+            padding: 15px 20px;
+            border-radius: 8px;
+            margin: 20px 0;
+        }}
+        .toc h2 {{
+            margin-top: 0;
+            font-size: 1.2em;
+            border-bottom: none;
+        }}
+        .lazy-section {{
+            min-height: 200px;
+        }}
+        .footnotes {{
+            font-size: 0.9em;
+            color: #555;
+        }}
     </style>
     
 </head>
@@ -903,54 +1287,33 @@ def generate_html_content(markdown_content, title, description, keywords, author
     {f'<strong>Journal:</strong> {paper_journal}<br>' if paper_journal else ''}
     {f'<strong>Published:</strong> {paper_date}<br>' if paper_date else ''}
     {f'<strong>DOI:</strong> <a href="https://doi.org/{paper_doi}" rel="noopener" target="_blank">{paper_doi}</a><br>' if paper_doi else ''}
-</div>''' if any([paper_url, paper_title, paper_authors, paper_journal, paper_date, paper_doi]) else ''}
+</div>''' if show_paper_block and any([paper_url, paper_title, paper_authors, paper_journal, paper_date, paper_doi]) else ''}
+
+        {toc_html}
 
         {html_content}
 
         <footer>
             <hr>
-            <p><em>Notes by {author} - Last updated: {datetime.now().strftime("%B %d, %Y")}</em></p>
+            <p><em>Notes by {author} - Last updated: {modified.strftime("%B %d, %Y")}</em></p>
             <p><strong>Author:</strong> <a href="https://lsy641.github.io/">{author}</a> | <strong>Google Scholar:</strong> <a href="https://scholar.google.com/citations?user=2OjUAPUAAAAJ" rel="noopener" target="_blank">Profile</a></p>
         </footer>
     </article>
+    {lazy_script}
+    <script>
+        if ('serviceWorker' in navigator) {{
+            window.addEventListener('load', function () {{
+                navigator.serviceWorker.register('/sw.js').catch(function () {{}});
+            }});
+        }}
+    </script>
 </body>
 </html>'''
     
     return html_template
 
-def convert_file(input_file, output_file=None, title=None, author="Siyang Liu", domain="https://lsy641.github.io"):
-    """Convert a markdown file to SEO-optimized HTML"""
-    
-    if not os.path.exists(input_file):
-        print(f"Error: Input file '{input_file}' not found.")
-        return False
-    
-    # Read markdown content
-    with open(input_file, 'r', encoding='utf-8') as f:
-        markdown_content = f.read()
-    
-    # Determine output filename
-    if output_file is None:
-        output_file = input_file.replace('.md', '-seo.html')
-    
-    # Determine title
-    if title is None:
-        title = os.path.splitext(os.path.basename(input_file))[0]
-        # Convert filename to title case
-        title = title.replace('-', ' ').replace('_', ' ').title()
-    
-    # Extract paper information
-    paper_info = extract_paper_info(markdown_content)
-    
-    # Generate description from content
-    lines = markdown_content.split('\n')
-    description = ""
-    for line in lines:
-        if line.strip() and not line.startswith('#') and not line.startswith('**') and len(line.strip()) > 20:
-            description = line.strip()[:200] + "..." if len(line.strip()) > 200 else line.strip()
-            break
-    
-    # Generate keywords
+def generate_keywords(markdown_content):
+    """Derive the keyword list for a note from the topics it mentions"""
     keywords = "research notes, academic analysis, literature review, academic research"
     if "ai" in markdown_content.lower():
         keywords += ", artificial intelligence"
@@ -962,9 +1325,23 @@ def convert_file(input_file, output_file=None, title=None, author="Siyang Liu",
         keywords += ", natural language processing"
     if "computer vision" in markdown_content.lower():
         keywords += ", computer vision"
+    return keywords
+
+def render_note(markdown_content, title, author="Siyang Liu", domain="https://lsy641.github.io", split_threshold=None, fragment_prefix=None, fragments=None, modified=None, page_url=None):
+    """Render a markdown note to a complete HTML page string; split sections are appended to fragments"""
+    
+    # Extract paper information, without the <br> markup and DOI resolver prefix the notes carry
+    paper_info = {field: clean_field(value) for field, value in extract_paper_info(markdown_content).items()}
+    paper_info['doi'] = normalize_doi(paper_info['doi'])
+    
+    # Generate description from content
+    description = extract_description(markdown_content)
+    
+    # Generate keywords
+    keywords = generate_keywords(markdown_content)
     
     # Use the new modern HTML generation function
-    html_content = generate_html_content(
+    return generate_html_content(
         markdown_content, 
         title, 
         description, 
@@ -974,14 +1351,155 @@ def convert_file(input_file, output_file=None, title=None, author="Siyang Liu",
         paper_info.get('title'),
         paper_info.get('authors'),
         paper_info.get('journal'),
-        paper_info.get('date'),
-        paper_info.get('doi')
+        paper_info.get('published'),
+        paper_info.get('doi'),
+        split_threshold,
+        fragment_prefix,
+        fragments,
+        modified,
+        page_url
     )
+
+def current_umask():
+    """Read the process umask (there is no way to query it without setting it)"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+# Read once at import, before any render thread exists: querying the umask means setting
+# it, and the umask is shared by every thread in the process
+OUTPUT_FILE_MODE = 0o666 & ~current_umask()
+
+class OutputWriter:
+    """Write outputs atomically (temp file + rename), skipping files whose bytes are unchanged.
+
+    In batch mode writes are staged and committed together on flush(): every temp file
+    is written, then synced, then renamed into place, then each directory is synced
+    once. With fsync=False the syncs are skipped entirely (fast path for CI).
+    """
+
+    def __init__(self, fsync=True, batch=False):
+        self.fsync = fsync
+        self.batch = batch
+        self.pending = {}
+        self.written = 0
+        self.skipped = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.flush()
+        else:
+            self.pending = {}
+
+    def write(self, path, content):
+        """Queue or write one file; returns False when the existing file is identical"""
+        data = content.encode('utf-8') if isinstance(content, str) else content
+        if is_identical(path, data):
+            self.skipped += 1
+            return False
+        self.pending[path] = data
+        if not self.batch:
+            self.flush()
+        return True
+
+    def flush(self):
+        """Commit every pending write"""
+        files, self.pending = self.pending, {}
+        if not files:
+            return
+        staged = []
+        try:
+            for path, data in files.items():
+                directory = os.path.dirname(os.path.abspath(path))
+                os.makedirs(directory, exist_ok=True)
+                fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(path) + '.', suffix='.tmp')
+                staged.append((temp_path, path))
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                    if self.fsync:
+                        f.flush()
+                        os.fsync(f.fileno())
+            for temp_path, path in staged:
+                # Keep the permissions a plain open(path, 'w') would have produced
+                os.chmod(temp_path, OUTPUT_FILE_MODE)
+                os.replace(temp_path, path)
+        except BaseException:
+            for temp_path, _ in staged:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+            raise
+        if self.fsync:
+            for directory in {os.path.dirname(os.path.abspath(path)) for path in files}:
+                fsync_directory(directory)
+        self.written += len(files)
+
+def fsync_directory(directory):
+    """Make renames durable; not every platform supports syncing a directory"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+def is_identical(path, data):
+    """Compare an existing file against new bytes: size first, then content hash"""
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+    except OSError:
+        return False
+    return digest.digest() == hashlib.sha256(data).digest()
+
+def convert_file(input_file, output_file=None, title=None, author="Siyang Liu", domain="https://lsy641.github.io", split_threshold=None, writer=None):
+    """Convert a markdown file to SEO-optimized HTML"""
+    
+    if not os.path.exists(input_file):
+        print(f"Error: Input file '{input_file}' not found.")
+        return False
+    
+    # Read markdown content
+    with open(input_file, 'r', encoding='utf-8') as f:
+        markdown_content = f.read()
+    
+    # Determine output filename
+    if output_file is None:
+        output_file = input_file.replace('.md', '-seo.html')
     
-    # Write HTML file
-    with open(output_file, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    # Determine title
+    if title is None:
+        title = os.path.splitext(os.path.basename(input_file))[0]
+        # Convert filename to title case
+        title = title.replace('-', ' ').replace('_', ' ').title()
     
+    fragments = []
+    fragment_prefix = os.path.splitext(os.path.basename(output_file))[0] + '.part-'
+    # The source's modification time keeps unchanged notes byte-identical across runs
+    modified = datetime.fromtimestamp(os.path.getmtime(input_file), timezone.utc)
+    page_url = f"{domain}/notes/{os.path.splitext(os.path.basename(output_file))[0]}"
+    html_content = render_note(markdown_content, title, author, domain, split_threshold, fragment_prefix, fragments, modified,
+                               page_url)
+    
+    # Write HTML file and lazy-loaded sections atomically, skipping identical ones
+    writer = writer or OutputWriter()
+    changed = writer.write(output_file, html_content)
+    for fragment_name, fragment_html in fragments:
+        writer.write(os.path.join(os.path.dirname(output_file), fragment_name), fragment_html)
+    
+    if not changed:
+        print(f"'{output_file}' is already up to date")
+        return True
     print(f"Successfully converted '{input_file}' to '{output_file}' with SEO optimization")
     return True
 
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+"""
+Page Weight Budget Analyzer
+Statically measures every HTML page in the output tree (bytes, compressed bytes,
+inline CSS/JS, external requests, render-blocking resources and image weight),
+writes a JSON report and can fail the build when a configured budget is exceeded
+"""
+
+import argparse
+import gzip
+import json
+import os
+import posixpath
+import sys
+from datetime import datetime
+from html.parser import HTMLParser
+from urllib.parse import urlsplit
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SKIP_DIRS = {'.git', '.build', '.github', 'node_modules', '__pycache__'}
+SITE_HOSTS = {'lsy641.github.io'}
+
+# Per-page limits; any of them can be overridden from a JSON file or --budget
+DEFAULT_BUDGETS = {
+    'html_bytes': 150_000,
+    'compressed_bytes': 40_000,
+    'inline_css_bytes': 20_000,
+    'inline_js_bytes': 20_000,
+    'structured_data_bytes': 10_000,
+    'external_requests': 15,
+    'render_blocking': 3,
+    'image_bytes': 1_000_000,
+}
+
+class PageWeightParser(HTMLParser):
+    """Collect inline code sizes and external resource references from one page"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.in_head = False
+        self.raw_tag = None
+        self.raw_type = ''
+        self.raw_bytes = 0
+        self.inline_css_bytes = 0
+        self.inline_js_bytes = 0
+        self.structured_data_bytes = 0
+        self.css_imports = 0
+        # (kind, url, render_blocking)
+        self.resources = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {name: (value or '') for name, value in attrs}
+        if tag == 'head':
+            self.in_head = True
+        elif tag == 'body':
+            self.in_head = False
+
+        if tag == 'link' and attrs.get('href'):
+            rel = attrs.get('rel', '').lower().split()
+            if 'stylesheet' in rel:
+                media = attrs.get('media', 'all').lower()
+                self.resources.append(('stylesheet', attrs['href'], media in ('', 'all', 'screen')))
+            elif 'icon' in rel or 'preload' in rel or 'modulepreload' in rel:
+                self.resources.append(('link', attrs['href'], False))
+        elif tag == 'script':
+            if attrs.get('src'):
+                deferred = 'async' in attrs or 'defer' in attrs or attrs.get('type') == 'module'
+                self.resources.append(('script', attrs['src'], self.in_head and not deferred))
+            self.raw_tag, self.raw_type, self.raw_bytes = 'script', attrs.get('type', '').lower(), 0
+        elif tag == 'style':
+            self.raw_tag, self.raw_type, self.raw_bytes = 'style', '', 0
+        elif 'data-include-header' in attrs:
+            # include-header.js fetches the shared header only after the page has loaded
+            self.resources.append(('xhr', '/partials/header.html', False))
+        elif tag in ('img', 'iframe', 'video', 'audio', 'source', 'embed') and attrs.get('src'):
+            kind = 'image' if tag == 'img' else tag
+            self.resources.append((kind, attrs['src'], False))
+
+    def handle_data(self, data):
+        if self.raw_tag:
+            self.raw_bytes += len(data.encode('utf-8'))
+            if self.raw_tag == 'style':
+                self.css_imports += data.count('@import')
+
+    def handle_endtag(self, tag):
+        if tag == 'head':
+            self.in_head = False
+        if tag != self.raw_tag:
+            return
+        if tag == 'style':
+            self.inline_css_bytes += self.raw_bytes
+        elif self.raw_type == 'application/ld+json':
+            self.structured_data_bytes += self.raw_bytes
+        elif self.raw_type in ('', 'text/javascript', 'module', 'application/javascript'):
+            self.inline_js_bytes += self.raw_bytes
+        self.raw_tag = None
+
+def compress(data):
+    """Compress as the transfer would: brotli when available, otherwise gzip"""
+    if brotli is not None:
+        return brotli.compress(data, quality=11)
+    return gzip.compress(data, compresslevel=9)
+
+def local_path(reference, page_path, root):
+    """Resolve a reference to a file in the output tree, or None for external URLs"""
+    parts = urlsplit(reference)
+    if parts.scheme in ('http', 'https') and parts.netloc not in SITE_HOSTS:
+        return None
+    if parts.scheme not in ('', 'http', 'https') or not parts.path:
+        return None
+    if parts.path.startswith('/'):
+        path = parts.path
+    else:
+        path = posixpath.join('/' + posixpath.dirname(page_path), parts.path)
+    full_path = os.path.join(root, posixpath.normpath(path).lstrip('/'))
+    return full_path if os.path.isfile(full_path) else None
+
+def analyze_page(root, page_path):
+    """Measure one page; returns the metrics dict used by the report and budgets"""
+    with open(os.path.join(root, page_path), 'rb') as f:
+        data = f.read()
+    parser = PageWeightParser()
+    parser.feed(data.decode('utf-8', errors='replace'))
+    parser.close()
+
+    image_bytes = 0
+    blocking = []
+    requests = set()
+    for kind, reference, render_blocking in parser.resources:
+        if reference.startswith(('data:', '#', 'mailto:', 'tel:')):
+            continue
+        requests.add(reference)
+        if render_blocking:
+            blocking.append(reference)
+        if kind == 'image':
+            path = local_path(reference, page_path, root)
+            if path:
+                image_bytes += os.path.getsize(path)
+    # CSS @import inside inline styles blocks rendering just like a <link>
+    blocking += ['@import'] * parser.css_imports
+
+    return {
+        'html_bytes': len(data),
+        'compressed_bytes': len(compress(data)),
+        'inline_css_bytes': parser.inline_css_bytes,
+        'inline_js_bytes': parser.inline_js_bytes,
+        'structured_data_bytes': parser.structured_data_bytes,
+        'external_requests': len(requests),
+        'render_blocking': len(blocking),
+        'render_blocking_resources': blocking,
+        'image_bytes': image_bytes,
+    }
+
+def discover_pages(root):
+    """Every .html page in the output tree, as '/' separated relative paths"""
+    pages = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(name for name in dirnames if name not in SKIP_DIRS and not name.startswith('.'))
+        for name in sorted(filenames):
+            if name.endswith('.html'):
+                pages.append(os.path.relpath(os.path.join(dirpath, name), root).replace(os.sep, '/'))
+    return pages
+
+def check_budgets(metrics, budgets):
+    """Return human-readable budget violations for one page"""
+    return [f"{name} {metrics[name]:,} > {limit:,}"
+            for name, limit in budgets.items() if name in metrics and metrics[name] > limit]
+
+def analyze_site(root='.', budgets=None):
+    """Analyze every page; returns the full report dict"""
+    budgets = {**DEFAULT_BUDGETS, **(budgets or {})}
+    pages = {}
+    for page_path in discover_pages(root):
+        metrics = analyze_page(root, page_path)
+        metrics['violations'] = check_budgets(metrics, budgets)
+        pages[page_path] = metrics
+    return {
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'compression': 'br' if brotli is not None else 'gzip',
+        'budgets': budgets,
+        'pages': pages,
+    }
+
+def print_report(report):
+    """Print a per-page table followed by any budget violations"""
+    print(f"{'page':<48} {'html':>8} {report['compression']:>7} {'css':>7} {'js':>7} {'req':>4} {'block':>5} {'img':>8}")
+    for page_path, metrics in report['pages'].items():
+        print(f"{page_path:<48} {metrics['html_bytes']:>8,} {metrics['compressed_bytes']:>7,} "
+              f"{metrics['inline_css_bytes']:>7,} {metrics['inline_js_bytes']:>7,} "
+              f"{metrics['external_requests']:>4} {metrics['render_blocking']:>5} {metrics['image_bytes']:>8,}")
+    for page_path, metrics in report['pages'].items():
+        for violation in metrics['violations']:
+            print(f"Over budget: {page_path}: {violation}")
+
+def main():
+    """Main function for command line usage"""
+    parser = argparse.ArgumentParser(description="Report page weight and enforce budgets for the built site")
+    parser.add_argument('root', nargs='?', default='.', help="output tree to analyze (default: .)")
+    parser.add_argument('--report', help="write the JSON report to this path")
+    parser.add_argument('--budgets', help="JSON file of budget overrides, e.g. {\"html_bytes\": 100000}")
+    parser.add_argument('--budget', action='append', default=[], metavar='NAME=LIMIT', help="override one budget")
+    parser.add_argument('--fail', action='store_true', help="exit non-zero when any page is over budget")
+    args = parser.parse_args()
+
+    budgets = {}
+    if args.budgets:
+        with open(args.budgets, 'r', encoding='utf-8') as f:
+            budgets.update(json.load(f))
+    for override in args.budget:
+        name, _, limit = override.partition('=')
+        if name not in DEFAULT_BUDGETS or not limit.isdigit():
+            parser.error(f"invalid budget '{override}'; known budgets: {', '.join(DEFAULT_BUDGETS)}")
+        budgets[name] = int(limit)
+
+    report = analyze_site(args.root, budgets)
+    print_report(report)
+
+    if args.report:
+        os.makedirs(os.path.dirname(os.path.abspath(args.report)), exist_ok=True)
+        with open(args.report, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=1)
+        print(f"Wrote report to '{args.report}'")
+
+    if args.fail and any(metrics['violations'] for metrics in report['pages'].values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
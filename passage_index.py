@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Similar Passages Index
+Splits every note into paragraph, list-item and quote passages, embeds them with
+hashed n-gram TF-IDF features reduced by a truncated SVD, and writes the int8
+vectors as a compact binary index that assets/js/similar-passages.js scores by
+brute force in the browser
+"""
+
+import argparse
+import html
+import json
+import os
+import re
+import struct
+import zlib
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import md_to_html_converter as converter
+from related_notes import STOP_WORDS
+
+INDEX_FILE = 'search/passages.bin'
+META_FILE = 'search/passages.json'
+NOTES_DIR = 'notes'
+MAGIC = b'PSG1'
+# magic, passages, dimensions, hash buckets, idf scale, vector scale
+HEADER = struct.Struct('<4sIIIff')
+
+# The browser downloads dimensions x buckets int8 projection weights, so both stay small
+HASH_BUCKETS = 4096
+DIMENSIONS = 64
+OVERSAMPLING = 16
+POWER_ITERATIONS = 2
+BLOCK_ROWS = 2048
+MIN_PASSAGE_WORDS = 6
+SNIPPET_LENGTH = 200
+
+WORD = re.compile(r'[a-z0-9]+')
+TAG = re.compile(r'<[^>]+>')
+NON_CONTENT = re.compile(r'<(script|style|nav|footer|head)\b.*?</\1\s*>', re.DOTALL | re.IGNORECASE)
+SECTION_FRAGMENT = re.compile(r'\.part-\d+\.html$')
+# Headings move the anchor; paragraphs, list items and quotes are passages. A list item
+# ends where its sub-list (or the next item) starts, so nested items stay separate
+PASSAGE_TOKEN = re.compile(
+    r'<h[1-6][^>]*\bid="(?P<anchor>[^"]+)"[^>]*>'
+    r'|<(?P<tag>p|li|blockquote)\b[^>]*>(?P<body>.*?)(?=</(?P=tag)>|<li\b|<[uo]l\b|</[uo]l>|<p\b)',
+    re.DOTALL | re.IGNORECASE)
+TITLE = re.compile(r'<title>(.*?)</title>', re.DOTALL | re.IGNORECASE)
+
+def split_passages(page_html):
+    """(anchor, text) for every passage, anchored at the nearest heading above it"""
+    anchor = ''
+    passages = []
+    for match in PASSAGE_TOKEN.finditer(NON_CONTENT.sub(' ', page_html)):
+        if match.group('anchor'):
+            anchor = match.group('anchor')
+            continue
+        text = ' '.join(html.unescape(TAG.sub(' ', match.group('body'))).split())
+        if len(text.split()) >= MIN_PASSAGE_WORDS:
+            passages.append((anchor, text))
+    return passages
+
+def passage_features(text):
+    """Words, word bigrams and character trigrams; the JS scorer extracts the same features"""
+    words = [word for word in WORD.findall(text.lower()) if word not in STOP_WORDS]
+    features = ['w:' + word for word in words]
+    features += ['b:' + first + ' ' + second for first, second in zip(words, words[1:])]
+    for word in words:
+        padded = '^' + word + '$'
+        features += ['c:' + padded[i:i + 3] for i in range(len(padded) - 2)]
+    return features
+
+def hashed_counts(text, buckets=HASH_BUCKETS):
+    """Bucket -> count; CRC-32 is stable across runs and cheap to reproduce in JS"""
+    counts = {}
+    for feature in passage_features(text):
+        bucket = zlib.crc32(feature.encode('utf-8')) & (buckets - 1)
+        counts[bucket] = counts.get(bucket, 0) + 1
+    return counts
+
+def collect_passages(root, notes):
+    """Passages of every note: markdown notes as rendered, hand-written notes as published"""
+    documents = []
+    for stem in sorted(notes):
+        # The body build_site renders (no H1, so anchors match the page), minus the paper's
+        # metadata lines, which are bibliography rather than passages worth finding
+        markdown_content = converter.PAPER_FIELD.sub('', converter.strip_title_heading(notes[stem]['markdown']))
+        documents.append((f'/notes/{stem}', notes[stem]['title'], converter.convert_markdown_to_html(markdown_content)))
+    notes_dir = os.path.join(root, NOTES_DIR)
+    for name in sorted(os.listdir(notes_dir)) if os.path.isdir(notes_dir) else []:
+        stem = name[:-len('.html')]
+        if not name.endswith('.html') or stem in notes or stem == 'index' or SECTION_FRAGMENT.search(name):
+            continue
+        with open(os.path.join(notes_dir, name), 'r', encoding='utf-8') as f:
+            page_html = f.read()
+        title = TITLE.search(page_html)
+        title = html.unescape(title.group(1)).split(' | ')[0].strip() if title else stem
+        documents.append((f'/notes/{stem}', title, page_html))
+
+    pages = []
+    passages = []
+    for url, title, page_html in documents:
+        page_passages = split_passages(page_html)
+        if not page_passages:
+            continue
+        passages += [(len(pages), anchor, text) for anchor, text in page_passages]
+        pages.append({'url': url, 'title': title})
+    return pages, passages
+
+def tfidf_rows(passages, buckets=HASH_BUCKETS):
+    """CSR arrays of L2-normalized, sublinear TF-IDF rows plus the (quantized) idf"""
+    rows = [hashed_counts(text, buckets) for _, _, text in passages]
+    indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+    indptr[1:] = np.cumsum([len(counts) for counts in rows])
+    indices = np.fromiter((bucket for counts in rows for bucket in counts), dtype=np.int64, count=indptr[-1])
+    counts = np.fromiter((count for row in rows for count in row.values()), dtype=np.float32, count=indptr[-1])
+
+    document_frequency = np.bincount(indices, minlength=buckets)
+    idf = np.log((1 + len(rows)) / (1 + document_frequency))
+    # The browser gets idf as uint8, so the offline vectors use the same rounded weights
+    idf_scale = float(idf.max()) / 255 if idf.max() > 0 else 1.0
+    idf_quantized = np.round(idf / idf_scale).astype(np.uint8)
+
+    data = np.log1p(counts) * (idf_quantized[indices] * np.float32(idf_scale))
+    row_ids = np.repeat(np.arange(len(rows)), np.diff(indptr))
+    norms = np.sqrt(np.bincount(row_ids, weights=data * data, minlength=len(rows)))
+    norms[norms == 0] = 1
+    data /= norms[row_ids].astype(np.float32)
+    return (indptr, indices, data.astype(np.float32)), idf_quantized, idf_scale
+
+def dense_blocks(csr, buckets=HASH_BUCKETS, block_rows=BLOCK_ROWS):
+    """Yield (start, dense rows) a block at a time so memory stays bounded"""
+    indptr, indices, data = csr
+    for start in range(0, len(indptr) - 1, block_rows):
+        stop = min(start + block_rows, len(indptr) - 1)
+        block = np.zeros((stop - start, buckets), dtype=np.float32)
+        rows = np.repeat(np.arange(stop - start), np.diff(indptr[start:stop + 1]))
+        block[rows, indices[indptr[start]:indptr[stop]]] = data[indptr[start]:indptr[stop]]
+        yield start, block
+
+def truncated_svd(csr, dimensions=DIMENSIONS, buckets=HASH_BUCKETS):
+    """Top right singular vectors (dimensions x buckets) by randomized range finding"""
+    n = len(csr[0]) - 1
+    rank = min(dimensions, n, buckets)
+    width = min(rank + OVERSAMPLING, n, buckets)
+    # Fixed seed: the same notes always produce the same index
+    omega = np.random.default_rng(0).standard_normal((buckets, width)).astype(np.float32)
+
+    def times(matrix):
+        return np.vstack([block @ matrix for _, block in dense_blocks(csr, buckets)])
+
+    def transpose_times(matrix):
+        result = np.zeros((buckets, matrix.shape[1]), dtype=np.float32)
+        for start, block in dense_blocks(csr, buckets):
+            result += block.T @ matrix[start:start + block.shape[0]]
+        return result
+
+    q, _ = np.linalg.qr(times(omega))
+    for _ in range(POWER_ITERATIONS):
+        z, _ = np.linalg.qr(transpose_times(q))
+        q, _ = np.linalg.qr(times(z))
+    _, _, vt = np.linalg.svd(transpose_times(q).T, full_matrices=False)
+    return vt[:rank].astype(np.float32)
+
+def quantize_rows(matrix):
+    """int8 rows with one float scale per row"""
+    scales = np.abs(matrix).max(axis=1) / 127
+    scales[scales == 0] = 1
+    return np.round(matrix / scales[:, None]).astype(np.int8), scales.astype(np.float32)
+
+def build_passage_index(root, notes):
+    """Return (binary index, metadata JSON) for every passage of every note"""
+    pages, passages = collect_passages(root, notes)
+    meta = {'version': 1, 'stop_words': sorted(STOP_WORDS), 'pages': pages,
+            'passages': [[page, anchor, text if len(text) <= SNIPPET_LENGTH else text[:SNIPPET_LENGTH].rstrip() + '…']
+                         for page, anchor, text in passages]}
+    if not passages:
+        return HEADER.pack(MAGIC, 0, 0, HASH_BUCKETS, 1.0, 1.0), json.dumps(meta, ensure_ascii=False)
+
+    csr, idf, idf_scale = tfidf_rows(passages)
+    components, component_scales = quantize_rows(truncated_svd(csr))
+    # Embed with the dequantized projection, exactly as the browser embeds a query
+    projection = (components.astype(np.float32) * component_scales[:, None]).T
+    vectors = np.vstack([block @ projection for _, block in dense_blocks(csr)])
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    vectors /= norms
+    vector_scale = float(np.abs(vectors).max()) / 127 or 1.0
+    quantized = np.round(vectors / vector_scale).astype(np.int8)
+
+    index = b''.join([
+        HEADER.pack(MAGIC, len(passages), components.shape[0], HASH_BUCKETS, idf_scale, vector_scale),
+        component_scales.astype('<f4').tobytes(),
+        idf.tobytes(),
+        components.tobytes(),
+        quantized.tobytes(),
+    ])
+    return index, json.dumps(meta, ensure_ascii=False)
+
+def load_passage_index(data):
+    """Parse the binary index back into arrays (used for checks and command-line queries)"""
+    magic, count, dimensions, buckets, idf_scale, vector_scale = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("not a passage index")
+    offset = HEADER.size
+    component_scales = np.frombuffer(data, dtype='<f4', count=dimensions, offset=offset)
+    offset += 4 * dimensions
+    idf = np.frombuffer(data, dtype=np.uint8, count=buckets, offset=offset)
+    offset += buckets
+    components = np.frombuffer(data, dtype=np.int8, count=dimensions * buckets, offset=offset).reshape(dimensions, buckets)
+    offset += dimensions * buckets
+    vectors = np.frombuffer(data, dtype=np.int8, count=count * dimensions, offset=offset).reshape(count, dimensions)
+    return {'idf': idf.astype(np.float32) * idf_scale, 'buckets': buckets, 'vector_scale': vector_scale,
+            'projection': (components.astype(np.float32) * component_scales[:, None]).T, 'vectors': vectors}
+
+def search(index, query, k=5):
+    """Brute-force cosine ranking of every passage against a query; mirrors the JS scorer"""
+    weights = np.zeros(index['buckets'], dtype=np.float32)
+    for bucket, count in hashed_counts(query, index['buckets']).items():
+        weights[bucket] = np.log1p(count) * index['idf'][bucket]
+    query_vector = weights @ index['projection']
+    norm = np.linalg.norm(query_vector)
+    if not norm:
+        return []
+    scores = index['vectors'].astype(np.float32) @ (query_vector / norm) * index['vector_scale']
+    top = np.argsort(-scores, kind='stable')[:k]
+    return [(int(i), float(scores[i])) for i in top]
+
+def main():
+    """Build the index for a site root from the command line, optionally running a query"""
+    parser = argparse.ArgumentParser(description="Build the similar-passages search index")
+    parser.add_argument('root', nargs='?', default='.', help="site root containing notes/ (default: .)")
+    parser.add_argument('--query', help="print the passages most similar to this text")
+    args = parser.parse_args()
+
+    if np is None:
+        print("Error: numpy is required to build the passage index")
+        raise SystemExit(1)
+
+    # Imported here: build_site imports this module for its render workers
+    import build_site
+    index, meta = build_passage_index(args.root, build_site.discover_notes(args.root))
+    writer = converter.OutputWriter(batch=True)
+    with writer:
+        writer.write(os.path.join(args.root, INDEX_FILE), index)
+        writer.write(os.path.join(args.root, META_FILE), meta)
+    meta = json.loads(meta)
+    print(f"Indexed {len(meta['passages'])} passages from {len(meta['pages'])} notes ({len(index):,} bytes)")
+
+    if args.query:
+        for i, score in search(load_passage_index(index), args.query):
+            page, anchor, snippet = meta['passages'][i]
+            url = meta['pages'][page]['url'] + (f'#{anchor}' if anchor else '')
+            print(f"{score:.3f}  {url}  {snippet[:100]}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Prefetch Hint Generator
+Builds the internal link graph from the generated HTML and gives every page a
+Speculation Rules block (with a <link rel="prefetch"> fallback) for its most likely
+next pages: related notes first, then in-content links, newest notes breaking ties,
+within a per-page budget of hinted bytes
+"""
+
+import argparse
+import json
+import os
+import posixpath
+import re
+from html.parser import HTMLParser
+
+import fingerprint_assets
+import md_to_html_converter as converter
+import page_budget
+
+# Estimated transfer bytes a single page may spend on prefetching its neighbours
+DEFAULT_HINT_BUDGET = 60_000
+DEFAULT_MAX_HINTS = 3
+
+# How strongly a link predicts the next navigation, by where it sits on the page
+LINK_WEIGHTS = {'related': 4, 'content': 2, 'chrome': 1}
+CHROME_TAGS = {'nav', 'footer'}
+
+SECTION_FRAGMENT = re.compile(r'\.part-\d+\.html$')
+HINTS_BLOCK = re.compile(r'<!-- prefetch-hints -->.*?<!-- /prefetch-hints -->\n[ \t]*', re.DOTALL)
+HEAD_CLOSE = re.compile(r'(?P<indent>[ \t]*)</head>')
+
+FALLBACK_SCRIPT = """if (!(HTMLScriptElement.supports && HTMLScriptElement.supports('speculationrules'))) {
+      __URLS__.forEach(function (url) {
+        var link = document.createElement('link');
+        link.rel = 'prefetch';
+        link.href = url;
+        document.head.appendChild(link);
+      });
+    }"""
+
+class LinkGraphParser(HTMLParser):
+    """Collect a page's <a href> links, the context each appears in, and its modified time"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.stack = []
+        self.modified = ''
+        # (href, context)
+        self.links = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {name: (value or '') for name, value in attrs}
+        if tag == 'meta' and attrs.get('property') == 'article:modified_time':
+            self.modified = attrs.get('content', '')
+        elif tag == 'a' and attrs.get('href'):
+            self.links.append((attrs['href'], self.context()))
+        if tag in ('section', 'nav', 'footer', 'aside'):
+            self.stack.append((tag, attrs.get('class', '').split()))
+
+    def handle_endtag(self, tag):
+        for index in range(len(self.stack) - 1, -1, -1):
+            if self.stack[index][0] == tag:
+                del self.stack[index:]
+                return
+
+    def context(self):
+        if any('related-notes' in classes for _, classes in self.stack):
+            return 'related'
+        if any(tag in CHROME_TAGS for tag, _ in self.stack):
+            return 'chrome'
+        return 'content'
+
+def resolve_page(reference, page_path, pages):
+    """Map an href to the page file it navigates to, or None if it is not an internal page"""
+    path = fingerprint_assets.resolve_reference(reference, page_path)
+    if path is None:
+        return None
+    # GitHub Pages serves /notes/ from notes/index.html and /notes/foo from notes/foo.html
+    for candidate in (path, path + '.html', posixpath.join(path, 'index.html')):
+        if candidate in pages:
+            return candidate
+    return None
+
+def parse_page(root, page_path):
+    """Parse one page with any previously injected hints removed; returns (html, parser)"""
+    with open(os.path.join(root, page_path), 'r', encoding='utf-8') as f:
+        html_content = HINTS_BLOCK.sub('', f.read())
+    parser = LinkGraphParser()
+    parser.feed(html_content)
+    parser.close()
+    return html_content, parser
+
+def build_link_graph(pages, parsed):
+    """Weighted edges page -> {target: (score, url)}; url is the href form the page uses most"""
+    graph = {}
+    for page_path in pages:
+        targets = {}
+        for href, context in parsed[page_path].links:
+            target = resolve_page(href, page_path, pages)
+            if target is None or target == page_path:
+                continue
+            url = href.split('#', 1)[0]
+            weight = LINK_WEIGHTS[context]
+            score, urls = targets.get(target, (0, {}))
+            urls[url] = urls.get(url, 0) + weight
+            targets[target] = (score + weight, urls)
+        graph[page_path] = {target: (score, max(urls, key=urls.get)) for target, (score, urls) in targets.items()}
+    return graph
+
+def select_hints(edges, parsed, transfer_sizes, budget=DEFAULT_HINT_BUDGET, max_hints=DEFAULT_MAX_HINTS):
+    """Pick the likeliest next pages, newest first among equals, until the byte budget is spent"""
+    ranked = sorted(edges.items(), key=lambda item: (item[1][0], parsed[item[0]].modified, item[0]), reverse=True)
+    hints = []
+    spent = 0
+    for target, (_, url) in ranked:
+        if len(hints) == max_hints:
+            break
+        if spent + transfer_sizes[target] > budget:
+            continue
+        spent += transfer_sizes[target]
+        hints.append(url)
+    return hints
+
+def hints_block(urls):
+    """Speculation Rules for supporting browsers, <link rel="prefetch"> for the rest"""
+    rules = json.dumps({'prefetch': [{'source': 'list', 'urls': urls}]})
+    fallback = FALLBACK_SCRIPT.replace('__URLS__', json.dumps(urls))
+    return f"""<!-- prefetch-hints -->
+    <script type="speculationrules">{rules}</script>
+    <script>
+    {fallback}
+    </script>
+    <!-- /prefetch-hints -->"""
+
+def generate_prefetch_hints(root='.', budget=DEFAULT_HINT_BUDGET, max_hints=DEFAULT_MAX_HINTS):
+    """Inject hints into every page; returns {page: [hinted urls]}"""
+    pages = [page_path for page_path in page_budget.discover_pages(root) if not SECTION_FRAGMENT.search(page_path)]
+    parsed = {}
+    documents = {}
+    for page_path in pages:
+        documents[page_path], parsed[page_path] = parse_page(root, page_path)
+    # Hints cost what the target costs on the wire, measured without its own hints
+    transfer_sizes = {page_path: len(page_budget.compress(documents[page_path].encode('utf-8'))) for page_path in pages}
+
+    graph = build_link_graph(set(pages), parsed)
+    report = {}
+    # Pages are committed atomically and together, never left half-written
+    writer = converter.OutputWriter(batch=True)
+    with writer:
+        for page_path in pages:
+            html_content = documents[page_path]
+            head_close = HEAD_CLOSE.search(html_content)
+            if not head_close:
+                continue
+            hints = select_hints(graph[page_path], parsed, transfer_sizes, budget, max_hints)
+            report[page_path] = hints
+            if hints:
+                indent = head_close.group('indent')
+                html_content = (html_content[:head_close.start()] + indent + hints_block(hints) + '\n'
+                                + html_content[head_close.start():])
+            writer.write(os.path.join(root, page_path), html_content)
+
+    print(f"Generated prefetch hints for {sum(1 for hints in report.values() if hints)} pages ({writer.written} updated)")
+    return report
+
+def main():
+    """Main function for command line usage"""
+    parser = argparse.ArgumentParser(description="Add prefetch hints for each page's likeliest next pages")
+    parser.add_argument('root', nargs='?', default='.', help="output tree to update (default: .)")
+    parser.add_argument('--budget', type=int, default=DEFAULT_HINT_BUDGET, metavar='BYTES',
+                        help=f"estimated transfer bytes hinted per page (default: {DEFAULT_HINT_BUDGET})")
+    parser.add_argument('--max-hints', type=int, default=DEFAULT_MAX_HINTS,
+                        help=f"most pages hinted per page (default: {DEFAULT_MAX_HINTS})")
+    parser.add_argument('--verbose', action='store_true', help="print the hints chosen for each page")
+    args = parser.parse_args()
+
+    report = generate_prefetch_hints(args.root, args.budget, args.max_hints)
+    if args.verbose:
+        for page_path, hints in report.items():
+            print(f"{page_path}: {', '.join(hints) or '-'}")
+
+if __name__ == "__main__":
+    main()
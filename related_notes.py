@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Related Notes Recommender
+Vectorizes every note with TF-IDF (boosted by the converter's keyword signals) and
+precomputes each note's top-k cosine neighbours for a static "Related notes" list
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import re
+from collections import Counter
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+import md_to_html_converter as converter
+
+VECTOR_CACHE = os.path.join('.build', 'related-vectors.json')
+TOP_K = 3
+BLOCK_SIZE = 256
+# Keyword phrases count as this many extra occurrences of the phrase term
+KEYWORD_BOOST = 3
+MIN_SIMILARITY = 0.05
+
+STOP_WORDS = set("""
+a an and are as at be been but by can could do does for from had has have how i if in into
+is it its may more most no not of on or our so such than that the their them then there these
+they this to too us was we were what when which while who will with would you your
+""".split())
+
+def tokenize(markdown_content):
+    """Split markdown into lowercase word terms, dropping markup, URLs and stop words"""
+    text = re.sub(r'\]\([^)]*\)', ']', markdown_content)
+    text = re.sub(r'https?://\S+', ' ', text)
+    return [word for word in re.findall(r"[a-z][a-z0-9\-]+", text.lower())
+            if word not in STOP_WORDS and len(word) > 2]
+
+def term_counts(markdown_content):
+    """Count the terms of one document, including the converter's keyword phrases"""
+    counts = Counter(tokenize(markdown_content))
+    for keyword in converter.generate_keywords(markdown_content).split(', '):
+        counts['kw:' + keyword.strip().lower()] += KEYWORD_BOOST
+    return dict(counts)
+
+def vectorizer_version():
+    """Hash of everything term_counts depends on besides the document itself"""
+    parts = [inspect.getsource(tokenize), inspect.getsource(term_counts),
+             inspect.getsource(converter.generate_keywords),
+             ' '.join(sorted(STOP_WORDS)), str(KEYWORD_BOOST)]
+    return hashlib.sha256('\n'.join(parts).encode('utf-8')).hexdigest()[:16]
+
+def load_vector_cache(root):
+    """Load the per-document-hash term counts from the previous build
+
+    Counts computed by a different tokenizer, keyword list or boost are discarded.
+    """
+    path = os.path.join(root, VECTOR_CACHE)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if not isinstance(cache, dict) or cache.get('version') != vectorizer_version():
+        return {}
+    return cache.get('counts', {})
+
+def save_vector_cache(root, cache):
+    """Persist term counts keyed by document hash, stamped with the vectorizer version"""
+    path = os.path.join(root, VECTOR_CACHE)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({'version': vectorizer_version(), 'counts': cache}, f, sort_keys=True)
+
+def tfidf_matrix(rows):
+    """Build an L2-normalized TF-IDF matrix (documents x vocabulary) from term counts"""
+    vocabulary = {}
+    for counts in rows:
+        for term in counts:
+            vocabulary.setdefault(term, len(vocabulary))
+
+    matrix = np.zeros((len(rows), max(len(vocabulary), 1)), dtype=np.float32)
+    for i, counts in enumerate(rows):
+        if counts:
+            columns = np.fromiter((vocabulary[term] for term in counts), dtype=np.int64, count=len(counts))
+            matrix[i, columns] = np.fromiter(counts.values(), dtype=np.float32, count=len(counts))
+
+    # Sublinear term frequency, smoothed inverse document frequency; terms every note
+    # shares (such as the converter's boilerplate keywords) carry no weight
+    document_frequency = np.count_nonzero(matrix, axis=0)
+    idf = np.log((1 + len(rows)) / (1 + document_frequency))
+    np.log1p(matrix, out=matrix)
+    matrix *= idf.astype(np.float32)
+
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1
+    return matrix / norms
+
+def top_k_neighbours(matrix, k=TOP_K, block_size=BLOCK_SIZE):
+    """Return (indices, scores) of each row's k most similar other rows"""
+    n = matrix.shape[0]
+    k = min(k, n - 1)
+    if k <= 0:
+        return np.zeros((n, 0), dtype=np.int64), np.zeros((n, 0), dtype=np.float32)
+
+    indices = np.empty((n, k), dtype=np.int64)
+    scores = np.empty((n, k), dtype=np.float32)
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        similarity = matrix[start:stop] @ matrix.T
+        similarity[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+        candidates = np.argpartition(-similarity, k - 1, axis=1)[:, :k]
+        candidate_scores = np.take_along_axis(similarity, candidates, axis=1)
+        order = np.argsort(-candidate_scores, axis=1, kind='stable')
+        indices[start:stop] = np.take_along_axis(candidates, order, axis=1)
+        scores[start:stop] = np.take_along_axis(candidate_scores, order, axis=1)
+    return indices, scores
+
+def compute_related_notes(root, notes, doc_hashes, k=TOP_K, dry_run=False):
+    """Map each note stem to its related note stems, reusing cached vectors by document hash
+
+    A dry run reads the vector cache but never writes it back.
+    """
+    if np is None:
+        print("Warning: numpy is not installed; skipping related notes")
+        return {stem: [] for stem in notes}
+    if not notes:
+        return {}
+
+    cache = load_vector_cache(root)
+    stems = sorted(notes)
+    rows = []
+    for stem in stems:
+        doc_hash = doc_hashes[stem]
+        if doc_hash not in cache:
+            cache[doc_hash] = term_counts(notes[stem]['markdown'])
+        rows.append(cache[doc_hash])
+    if not dry_run:
+        save_vector_cache(root, {doc_hashes[stem]: cache[doc_hashes[stem]] for stem in stems})
+
+    indices, scores = top_k_neighbours(tfidf_matrix(rows), k)
+    return {
+        stem: [stems[j] for j, score in zip(indices[i], scores[i]) if score >= MIN_SIMILARITY]
+        for i, stem in enumerate(stems)
+    }
+
+def generate_related_notes_html(related, notes, domain="https://lsy641.github.io"):
+    """Render the static "Related notes" section for one page"""
+    if not related:
+        return ''
+    items = '\n'.join(
+        f'            <li><a href="{domain}/notes/{stem}">{notes[stem]["title"]}</a></li>'
+        for stem in related
+    )
+    return f"""<section class="related-notes">
+            <h2>Related notes</h2>
+            <ul>
+{items}
+            </ul>
+        </section>
+
+        """
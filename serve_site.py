@@ -0,0 +1,356 @@
+#!/usr/bin/env python3
+"""
+Local Production Server
+Serves the build output the way a caching CDN would: precompressed .br/.gz copies
+chosen by Accept-Encoding, Cache-Control per asset class (immutable for fingerprinted
+assets, revalidate for HTML), strong ETags from asset-manifest.json with 304 handling,
+byte ranges (e.g. for siyangliu_resume.pdf) and zero-copy sendfile bodies, so cache
+behaviour can be measured locally and the site served under load
+"""
+
+import argparse
+import gzip
+import hashlib
+import mimetypes
+import os
+import posixpath
+import threading
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+import asset_manifest
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+DEFAULT_BIND = '127.0.0.1'
+DEFAULT_PORT = 8000
+
+# Content-Encoding -> suffix of the precompressed copy, in order of preference
+PRECOMPRESSED = [('br', '.br'), ('gzip', '.gz')]
+# Precompressed copies mirror the site under the build cache, never in the working tree
+PRECOMPRESSED_DIR = os.path.join('.build', 'precompressed')
+COMPRESSIBLE_EXTENSIONS = {'.html', '.css', '.js', '.json', '.xml', '.svg', '.txt', '.bin', '.webmanifest'}
+# Below this the compressed body plus its headers saves nothing worth a second file
+MIN_PRECOMPRESS_BYTES = 256
+SKIP_DIRS = {'.git', '.build', '.github', 'node_modules', '__pycache__'}
+# The only file types the site publishes; sources (.py, .md...) and repo files are not served
+SITE_EXTENSIONS = {'.html', '.css', '.js', '.json', '.xml', '.txt', '.bin', '.bib', '.webmanifest', '.pdf',
+                   '.png', '.jpg', '.jpeg', '.gif', '.webp', '.svg', '.ico', '.woff', '.woff2'}
+
+CACHE_POLICIES = {
+    # Content-hashed names never change meaning, so browsers may keep them for a year
+    'immutable': 'public, max-age=31536000, immutable',
+    # Pages and the files that point at fingerprinted names must be checked every time
+    'revalidate': 'no-cache',
+    # Everything else gets the ten minutes GitHub Pages gives every file
+    'default': 'public, max-age=600, must-revalidate',
+}
+REVALIDATE_FILES = {'sw.js', asset_manifest.MANIFEST_FILE, 'feed.xml', 'sitemap.xml', 'robots.txt'}
+
+mimetypes.add_type('text/javascript', '.js')
+mimetypes.add_type('application/manifest+json', '.webmanifest')
+
+def cache_policy(path):
+    """Cache-Control value for a site-relative path, by asset class"""
+    name = posixpath.basename(path)
+    if asset_manifest.FINGERPRINTED_NAME.match(name):
+        return CACHE_POLICIES['immutable']
+    if name.endswith('.html') or path in REVALIDATE_FILES:
+        return CACHE_POLICIES['revalidate']
+    return CACHE_POLICIES['default']
+
+def content_type(path):
+    """MIME type with a charset for text, e.g. 'text/html; charset=utf-8'"""
+    mime_type = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    if mime_type.startswith('text/') or mime_type in ('application/json', 'application/manifest+json', 'image/svg+xml'):
+        return f'{mime_type}; charset=utf-8'
+    return mime_type
+
+def load_manifest_hashes(root):
+    """{fingerprinted path: (sha256, size)} from asset-manifest.json, or {} before fingerprinting"""
+    return {asset['path']: (asset['sha256'], asset['size']) for asset in asset_manifest.load_manifest(root).values()}
+
+def resolve_path(root, url_path):
+    """Map a URL path to (site-relative file, redirect location); both None means not found"""
+    path = posixpath.normpath(unquote(url_path))
+    segments = [segment for segment in path.split('/') if segment]
+    # Dotfiles (.git, .build, .github...) are never part of the site
+    if any(segment.startswith('.') for segment in segments):
+        return None, None
+    relative = '/'.join(segments)
+    full_path = os.path.join(root, relative)
+    if os.path.isdir(full_path):
+        if not url_path.endswith('/'):
+            return None, '/' + relative + '/'
+        relative = posixpath.join(relative, 'index.html')
+    elif not os.path.isfile(full_path) and os.path.isfile(full_path + '.html'):
+        # Pretty URLs, as GitHub Pages serves /notes/foo from notes/foo.html
+        relative += '.html'
+    if posixpath.splitext(relative)[1].lower() not in SITE_EXTENSIONS:
+        return None, None
+    full_path = os.path.realpath(os.path.join(root, relative))
+    if not full_path.startswith(os.path.realpath(root) + os.sep) or not os.path.isfile(full_path):
+        return None, None
+    return relative, None
+
+def precompressed_path(root, relative, suffix):
+    """Where precompress_site keeps the compressed copy of a site-relative file"""
+    return os.path.join(root, PRECOMPRESSED_DIR, relative.replace('/', os.sep) + suffix)
+
+def accepted_encodings(header):
+    """Content codings the client accepts (q > 0), lowercased"""
+    accepted = set()
+    for item in header.split(','):
+        name, _, params = item.partition(';')
+        quality = 1.0
+        for param in params.split(';'):
+            key, _, value = param.strip().partition('=')
+            if key.lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if name.strip() and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+def parse_range(header, size):
+    """Inclusive (start, end) of a single 'bytes=' range, or None to ignore the header and send it all
+
+    Raises ValueError when the range is well-formed but lies beyond the end of the file
+    """
+    unit, _, spec = header.partition('=')
+    # Multiple ranges would need multipart/byteranges; a full 200 is an allowed answer
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, dash, last = spec.strip().partition('-')
+    if not dash or not (first or last) or (first and not first.isdigit()) or (last and not last.isdigit()):
+        return None
+    if not first:
+        # Suffix range: the last N bytes
+        if int(last) == 0 or size == 0:
+            raise ValueError('unsatisfiable range')
+        return max(0, size - int(last)), size - 1
+    start = int(first)
+    end = int(last) if last else size - 1
+    if start >= size:
+        raise ValueError('unsatisfiable range')
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+def etag_matches(header, etag):
+    """If-None-Match comparison, which is weak: W/"x" matches "x" """
+    candidates = [candidate.strip() for candidate in header.split(',')]
+    return '*' in candidates or any(candidate.removeprefix('W/') == etag for candidate in candidates)
+
+def precompress_site(root='.'):
+    """Write .br (when brotli is installed) and .gz copies of compressible files; returns files written"""
+    encoders = [('.gz', lambda data: gzip.compress(data, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        encoders.insert(0, ('.br', lambda data: brotli.compress(data, quality=11)))
+    written = 0
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(name for name in dirnames if name not in SKIP_DIRS and not name.startswith('.'))
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            if os.path.splitext(name)[1] not in COMPRESSIBLE_EXTENSIONS or os.path.getsize(path) < MIN_PRECOMPRESS_BYTES:
+                continue
+            relative = os.path.relpath(path, root).replace(os.sep, '/')
+            with open(path, 'rb') as f:
+                data = f.read()
+            for suffix, compress in encoders:
+                copy = precompressed_path(root, relative, suffix)
+                if os.path.exists(copy) and os.path.getmtime(copy) >= os.path.getmtime(path):
+                    continue
+                compressed = compress(data)
+                if len(compressed) < len(data):
+                    os.makedirs(os.path.dirname(copy), exist_ok=True)
+                    with open(copy, 'wb') as f:
+                        f.write(compressed)
+                    written += 1
+                elif os.path.exists(copy):
+                    os.remove(copy)
+    print(f"Wrote {written} precompressed files")
+    return written
+
+class SiteRequestHandler(BaseHTTPRequestHandler):
+    """GET/HEAD for static files with content negotiation, validators and ranges"""
+    protocol_version = 'HTTP/1.1'
+    server_version = 'serve_site'
+
+    def do_GET(self):
+        self.serve(send_body=True)
+
+    def do_HEAD(self):
+        self.serve(send_body=False)
+
+    def serve(self, send_body):
+        server = self.server
+        relative, redirect = resolve_path(server.root, urlsplit(self.path).path)
+        if redirect:
+            query = urlsplit(self.path).query
+            self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+            self.send_header('Location', redirect + ('?' + query if query else ''))
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if relative is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+
+        path = os.path.join(server.root, relative)
+        stat = os.stat(path)
+        etag = server.etag(relative, path, stat)
+        headers = {
+            'Content-Type': content_type(relative),
+            'Cache-Control': cache_policy(relative),
+            'Last-Modified': formatdate(stat.st_mtime, usegmt=True),
+            'Accept-Ranges': 'bytes',
+            'X-Content-Type-Options': 'nosniff',
+        }
+
+        # Precompressed copies older than the file are leftovers from an earlier build
+        siblings = [(encoding, precompressed_path(server.root, relative, suffix)) for encoding, suffix in PRECOMPRESSED]
+        siblings = [(encoding, sibling) for encoding, sibling in siblings
+                    if os.path.isfile(sibling) and os.path.getmtime(sibling) >= stat.st_mtime]
+        if siblings:
+            headers['Vary'] = 'Accept-Encoding'
+        range_header = self.headers.get('Range')
+        if range_header and self.headers.get('If-Range') not in (None, etag, headers['Last-Modified']):
+            range_header = None
+        accepted = accepted_encodings(self.headers.get('Accept-Encoding', ''))
+        # Ranges are always over the identity encoding, which is what PDF viewers expect
+        if not range_header:
+            for encoding, sibling in siblings:
+                if encoding in accepted or '*' in accepted:
+                    path = sibling
+                    headers['Content-Encoding'] = encoding
+                    # Each representation needs its own strong validator
+                    etag = etag[:-1] + f'-{encoding}"'
+                    break
+        headers['ETag'] = etag
+
+        if self.not_modified(etag, stat):
+            self.send_headers(HTTPStatus.NOT_MODIFIED, {name: headers[name] for name in
+                                                       ('Cache-Control', 'ETag', 'Last-Modified', 'Vary') if name in headers})
+            return
+
+        size = os.path.getsize(path)
+        start, end = 0, size - 1
+        status = HTTPStatus.OK
+        if range_header:
+            try:
+                byte_range = parse_range(range_header, size)
+            except ValueError:
+                self.send_headers(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE,
+                                  {'Content-Range': f'bytes */{size}', 'Content-Length': '0'})
+                return
+            if byte_range:
+                start, end = byte_range
+                status = HTTPStatus.PARTIAL_CONTENT
+                headers['Content-Range'] = f'bytes {start}-{end}/{size}'
+        headers['Content-Length'] = str(end - start + 1)
+        self.send_headers(status, headers)
+
+        if send_body and end >= start:
+            with open(path, 'rb') as f:
+                try:
+                    # socket.sendfile uses os.sendfile where available: file to socket with no userspace copy
+                    self.connection.sendfile(f, start, end - start + 1)
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True
+
+    def not_modified(self, etag, stat):
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match is not None:
+            return etag_matches(if_none_match, etag)
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                return int(stat.st_mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def send_headers(self, status, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+class SiteServer(ThreadingHTTPServer):
+    """Threaded HTTP server that caches validators for the files it serves"""
+    daemon_threads = True
+
+    def __init__(self, address, root, quiet=False):
+        self.root = root
+        self.quiet = quiet
+        self.lock = threading.Lock()
+        self.manifest_mtime = None
+        self.manifest_hashes = {}
+        # path -> (mtime_ns, size, sha256) for files the manifest does not cover
+        self.hash_cache = {}
+        super().__init__(address, SiteRequestHandler)
+
+    def etag(self, relative, path, stat):
+        """Strong ETag: the manifest's sha256 for fingerprinted assets, else a cached content hash"""
+        with self.lock:
+            # Reload the manifest when a rebuild rewrites it while the server is running
+            try:
+                manifest_mtime = os.stat(os.path.join(self.root, asset_manifest.MANIFEST_FILE)).st_mtime_ns
+            except OSError:
+                manifest_mtime = None
+            if manifest_mtime != self.manifest_mtime:
+                self.manifest_hashes = load_manifest_hashes(self.root)
+                self.manifest_mtime = manifest_mtime
+            digest, size = self.manifest_hashes.get(relative, (None, None))
+            if digest and size == stat.st_size:
+                return f'"{digest}"'
+            cached = self.hash_cache.get(path)
+            if cached and cached[:2] == (stat.st_mtime_ns, stat.st_size):
+                return f'"{cached[2]}"'
+        with open(path, 'rb') as f:
+            digest = hashlib.file_digest(f, 'sha256').hexdigest()
+        with self.lock:
+            self.hash_cache[path] = (stat.st_mtime_ns, stat.st_size, digest)
+        return f'"{digest}"'
+
+def serve(root='.', bind=DEFAULT_BIND, port=DEFAULT_PORT, quiet=False):
+    """Serve the site in the foreground until interrupted"""
+    server = SiteServer((bind, port), os.path.abspath(root), quiet)
+    host, port = server.server_address[:2]
+    print(f"Serving '{root}' on http://{host}:{port}/")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+def main():
+    """Main function for command line usage"""
+    parser = argparse.ArgumentParser(description="Serve the built site with production-like caching and compression")
+    parser.add_argument('root', nargs='?', default='.', help="output tree to serve (default: .)")
+    parser.add_argument('--bind', default=DEFAULT_BIND, help=f"address to listen on (default: {DEFAULT_BIND})")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help=f"port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument('--precompress', action='store_true',
+                        help=f"write missing or stale .br/.gz copies to {PRECOMPRESSED_DIR} before serving")
+    parser.add_argument('--quiet', action='store_true', help="do not log each request (e.g. under load tests)")
+    args = parser.parse_args()
+
+    if args.precompress:
+        precompress_site(args.root)
+    serve(args.root, args.bind, args.port, args.quiet)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Service Worker Generator
+Emits sw.js with a precache manifest of content-hashed URLs from the build output:
+shared assets are served cache-first, pages stale-while-revalidate, and only files
+whose hash changed are re-downloaded when the worker updates
+"""
+
+import hashlib
+import json
+import os
+import sys
+
+import asset_manifest
+
+SERVICE_WORKER_FILE = 'sw.js'
+
+# Served cache-first: they only change together with their revision hash
+SHARED_ASSETS = [
+    'assets/css/modern.css',
+    'assets/js/include-header.js',
+    'assets/js/similar-passages.js',
+    'partials/header.html',
+]
+# Built by passage_index.py alongside the pages, so a new index always ships with a new sw.js
+SEARCH_INDEX = ['search/passages.bin', 'search/passages.json']
+ASSET_DIRS = ['images']
+# Served stale-while-revalidate: instant from cache, refreshed in the background
+ROOT_PAGES = ['index.html', 'research-notes.html', 'cv.html']
+NOTES_DIR = 'notes'
+
+SERVICE_WORKER_TEMPLATE = """// Generated by service_worker.py - do not edit by hand
+// Changes whenever a precached file does, which is what makes browsers install the update
+var VERSION = '__VERSION__';
+var PRECACHE = 'precache-v1';
+// Runtime copies are only newer than the precache within one deploy: a page cached
+// before it may link fingerprinted assets the deploy removed, so each version starts
+// a fresh runtime cache and activate deletes the old one
+var RUNTIME = 'runtime-' + VERSION;
+var MANIFEST = __MANIFEST__;
+
+// Precache entries are stored under url?__rev=<hash>, so an unchanged file keeps
+// its cache entry across versions and only changed files are fetched again
+function revisionedUrl(entry) {
+  return new URL(entry.url + '?__rev=' + entry.revision, self.location).href;
+}
+
+var precacheKeys = {};
+MANIFEST.forEach(function (entry) {
+  precacheKeys[new URL(entry.url, self.location).href] = { key: revisionedUrl(entry), strategy: entry.strategy };
+});
+
+// GitHub Pages serves /notes/foo and /notes/foo.html as the same page
+function lookup(url) {
+  var clean = url.origin + url.pathname;
+  if (precacheKeys[clean]) return precacheKeys[clean];
+  if (clean.endsWith('/')) return precacheKeys[clean + 'index.html'];
+  if (!/\\.[a-z0-9]+$/i.test(url.pathname)) return precacheKeys[clean + '.html'];
+  return undefined;
+}
+
+self.addEventListener('install', function (event) {
+  event.waitUntil(caches.open(PRECACHE).then(function (cache) {
+    return Promise.all(MANIFEST.map(function (entry) {
+      var key = revisionedUrl(entry);
+      return cache.match(key).then(function (cached) {
+        if (cached) return;
+        return fetch(entry.url, { cache: 'no-cache' }).then(function (response) {
+          if (response.ok) return cache.put(key, response);
+        });
+      });
+    }));
+  }).then(function () { return self.skipWaiting(); }));
+});
+
+self.addEventListener('activate', function (event) {
+  var wanted = {};
+  MANIFEST.forEach(function (entry) { wanted[revisionedUrl(entry)] = true; });
+  event.waitUntil(caches.open(PRECACHE).then(function (cache) {
+    return cache.keys().then(function (requests) {
+      return Promise.all(requests.map(function (request) {
+        if (!wanted[request.url]) return cache.delete(request);
+      }));
+    });
+  }).then(function () {
+    return caches.keys().then(function (names) {
+      return Promise.all(names.map(function (name) {
+        if (name !== PRECACHE && name !== RUNTIME) return caches.delete(name);
+      }));
+    });
+  }).then(function () { return self.clients.claim(); }));
+});
+
+function cacheFirst(request, key) {
+  return caches.open(PRECACHE).then(function (cache) {
+    return cache.match(key).then(function (cached) {
+      return cached || fetch(request).then(function (response) {
+        if (response.ok) cache.put(key, response.clone());
+        return response;
+      });
+    });
+  });
+}
+
+function staleWhileRevalidate(event, key) {
+  var request = event.request;
+  // A background refresh lands in RUNTIME, so prefer it over the build-time precache copy
+  return caches.open(RUNTIME).then(function (cache) {
+    return cache.match(request);
+  }).then(function (cached) {
+    return cached || (key ? caches.match(key) : undefined);
+  }).then(function (cached) {
+    var network = fetch(request).then(function (response) {
+      if (response.ok) {
+        var copy = response.clone();
+        caches.open(RUNTIME).then(function (cache) { cache.put(request, copy); });
+      }
+      return response;
+    });
+    if (cached) {
+      event.waitUntil(network.catch(function () {}));
+      return cached;
+    }
+    return network;
+  });
+}
+
+self.addEventListener('fetch', function (event) {
+  var request = event.request;
+  if (request.method !== 'GET') return;
+  var url = new URL(request.url);
+  if (url.origin !== self.location.origin) return;
+
+  var entry = lookup(url);
+  if (entry && entry.strategy === 'cache-first') {
+    event.respondWith(cacheFirst(request, entry.key));
+  } else if (entry || request.mode === 'navigate') {
+    event.respondWith(staleWhileRevalidate(event, entry && entry.key));
+  }
+});
+"""
+
+def file_revision(path):
+    """Content hash used as the precache revision"""
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()[:16]
+
+def precache_manifest(root):
+    """List every precached URL with its revision hash and caching strategy"""
+    entries = []
+    # After fingerprint_assets.py has run, pages reference the hashed copies instead
+    fingerprints = {source: asset['path'] for source, asset in asset_manifest.load_manifest(root).items()}
+
+    def add(path, strategy):
+        path = path.replace(os.sep, '/')
+        if asset_manifest.original_path(path) in fingerprints or path.endswith(asset_manifest.PRECOMPRESSED_SUFFIXES):
+            return
+        path = fingerprints.get(path, path)
+        full_path = os.path.join(root, path)
+        if os.path.isfile(full_path):
+            entries.append({'url': '/' + path.replace(os.sep, '/'), 'revision': file_revision(full_path),
+                            'strategy': strategy})
+
+    for path in SHARED_ASSETS + SEARCH_INDEX:
+        add(path, 'cache-first')
+    for directory in ASSET_DIRS:
+        if os.path.isdir(os.path.join(root, directory)):
+            for name in sorted(os.listdir(os.path.join(root, directory))):
+                add(os.path.join(directory, name), 'cache-first')
+    for path in ROOT_PAGES:
+        add(path, 'stale-while-revalidate')
+    if os.path.isdir(os.path.join(root, NOTES_DIR)):
+        for name in sorted(os.listdir(os.path.join(root, NOTES_DIR))):
+            if name.endswith('.html'):
+                add(os.path.join(NOTES_DIR, name), 'stale-while-revalidate')
+    return entries
+
+def generate_service_worker(root='.'):
+    """Render sw.js; its version is derived from the output hashes it precaches"""
+    manifest = precache_manifest(root)
+    manifest_json = json.dumps(manifest, indent=1, sort_keys=True)
+    version = hashlib.sha256(manifest_json.encode('utf-8')).hexdigest()[:12]
+    return SERVICE_WORKER_TEMPLATE.replace('__VERSION__', version).replace('__MANIFEST__', manifest_json)
+
+def main():
+    """Write sw.js for a site root from the command line"""
+    root = sys.argv[1] if len(sys.argv) > 1 else '.'
+    with open(os.path.join(root, SERVICE_WORKER_FILE), 'w', encoding='utf-8') as f:
+        f.write(generate_service_worker(root))
+    print(f"Wrote '{os.path.join(root, SERVICE_WORKER_FILE)}'")
+
+if __name__ == "__main__":
+    main()
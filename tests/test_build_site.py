@@ -0,0 +1,136 @@
+"""Build the published note end to end and check the links search engines and readers follow"""
+
+import hashlib
+import os
+import re
+import shutil
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import build_site
+import passage_index
+import service_worker
+import md_to_html_converter as converter
+
+NOTE = 'roadmap-AI-in-robotics'
+PAGE_URL = f'https://lsy641.github.io/notes/{NOTE}'
+NOTE_SOURCE = os.path.join(build_site.NOTES_DIR, NOTE + '.md')
+DOI = '10.1038/s42256-025-01050-6'
+
+class BuildNoteTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        os.makedirs(os.path.join(self.root, build_site.NOTES_DIR))
+        shutil.copy(os.path.join(ROOT, build_site.NOTES_DIR, NOTE + '.md'),
+                    os.path.join(self.root, build_site.NOTES_DIR))
+
+    def build(self):
+        build_site.build_site(self.root, workers=1, fsync=False)
+        with open(os.path.join(self.root, build_site.NOTES_DIR, NOTE + '.html'), 'r', encoding='utf-8') as f:
+            return f.read()
+
+    def test_canonical_url_is_the_file_name(self):
+        html_content = self.build()
+        self.assertIn(f'<link rel="canonical" href="{PAGE_URL}" />', html_content)
+        self.assertIn(f'<meta property="og:url" content="{PAGE_URL}" />', html_content)
+
+    def test_paper_metadata_is_rendered_once_and_clean(self):
+        html_content = self.build()
+        self.assertEqual(len(re.findall(r'<h2[^>]*>About the Paper</h2>', html_content)), 1)
+        self.assertNotIn('doi.org/https://', html_content)
+        self.assertNotRegex(html_content, r'<br>\s*<br>')
+
+    def test_doi_link_of_template_paper_block(self):
+        # Without its own "About the Paper" heading the note gets the template's block
+        with open(os.path.join(self.root, build_site.NOTES_DIR, NOTE + '.md'), 'r', encoding='utf-8') as f:
+            markdown_content = f.read()
+        markdown_content = converter.PAPER_SECTION.sub('', markdown_content)
+        html_content = converter.render_note(converter.strip_title_heading(markdown_content), 'Roadmap',
+                                             page_url=PAGE_URL)
+        self.assertIn(f'<a href="https://doi.org/{DOI}" rel="noopener" target="_blank">{DOI}</a><br>', html_content)
+        self.assertEqual(len(re.findall(r'About the Paper', html_content)), 1)
+        self.assertNotRegex(html_content, r'<br>\s*<br>')
+
+    def test_dry_run_writes_nothing(self):
+        build_site.build_site(self.root, workers=1, dry_run=True)
+        self.assertEqual(os.listdir(self.root), [build_site.NOTES_DIR])
+        self.assertEqual(os.listdir(os.path.join(self.root, build_site.NOTES_DIR)), [NOTE + '.md'])
+
+    def test_only_feed_leaves_the_pages_alone(self):
+        build_site.build_site(self.root, workers=1, fsync=False, only=['feed'])
+        self.assertEqual(sorted(os.listdir(os.path.join(self.root, build_site.NOTES_DIR))), [NOTE + '.md'])
+        self.assertFalse(os.path.exists(os.path.join(self.root, build_site.STATE_FILE)))
+        with open(os.path.join(self.root, NOTE_SOURCE), 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()
+        with open(os.path.join(self.root, 'feed.xml'), 'r', encoding='utf-8') as f:
+            self.assertIn(f'<site:contentHash>sha256:{digest}</site:contentHash>', f.read())
+
+    @unittest.skipIf(passage_index.np is None, "numpy is not installed")
+    def test_service_worker_precaches_the_search_index(self):
+        os.makedirs(os.path.join(self.root, 'assets', 'js'))
+        shutil.copy(os.path.join(ROOT, 'assets', 'js', 'similar-passages.js'), os.path.join(self.root, 'assets', 'js'))
+        self.build()
+        with open(os.path.join(self.root, service_worker.SERVICE_WORKER_FILE), 'r', encoding='utf-8') as f:
+            sw = f.read()
+        for path in ['assets/js/similar-passages.js'] + service_worker.SEARCH_INDEX:
+            self.assertIn(f'"url": "/{path}"', sw)
+
+    def test_passages_skip_the_title_and_paper_metadata(self):
+        html_content = self.build()
+        notes = build_site.discover_notes(self.root)
+        pages, passages = passage_index.collect_passages(self.root, notes)
+        anchors = set(re.findall(r'id="([^"]+)"', html_content))
+        self.assertTrue(passages)
+        for _, anchor, text in passages:
+            self.assertIn(anchor, anchors)
+            self.assertNotIn('Aude Billard', text)
+            self.assertNotIn('Reading Notes', text)
+
+class IncrementalBuildTest(unittest.TestCase):
+    """A title edit reaches the index and the notes linking to it; a body edit stops at the note"""
+
+    NOTES = {
+        'alpha': '# Alpha Note\n\nAlpha introduces the topic and points at [beta](beta.md) for details.\n',
+        'beta': '# Beta Note\n\nBeta covers the details that the other notes refer to.\n\nA closing remark.\n',
+        'gamma': '# Gamma Note\n\nGamma is a standalone note about something else entirely.\n',
+    }
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        os.makedirs(os.path.join(self.root, build_site.NOTES_DIR))
+        for stem, markdown_content in self.NOTES.items():
+            self.write(stem, markdown_content)
+        build_site.build_site(self.root, workers=1, fsync=False)
+
+    def write(self, stem, markdown_content):
+        with open(os.path.join(self.root, build_site.NOTES_DIR, stem + '.md'), 'w', encoding='utf-8') as f:
+            f.write(markdown_content)
+
+    def rebuilt_pages(self):
+        rebuilt = build_site.build_site(self.root, workers=1, fsync=False)
+        return {path for path in rebuilt if path.startswith(build_site.NOTES_DIR + os.sep)}
+
+    def note_page(self, stem):
+        return os.path.join(build_site.NOTES_DIR, stem + '.html')
+
+    def test_unchanged_site_rebuilds_nothing(self):
+        self.assertEqual(build_site.build_site(self.root, workers=1, fsync=False), [])
+
+    def test_title_edit_rebuilds_the_note_index_and_linking_notes(self):
+        self.write('beta', self.NOTES['beta'].replace('# Beta Note', '# Beta Note, Renamed'))
+        self.assertEqual(self.rebuilt_pages(),
+                         {self.note_page('beta'), self.note_page('alpha'), build_site.INDEX_PAGE})
+
+    def test_body_edit_stops_at_the_note(self):
+        self.write('beta', self.NOTES['beta'].replace('A closing remark.', 'A longer closing remark.'))
+        self.assertEqual(self.rebuilt_pages(), {self.note_page('beta')})
+
+if __name__ == '__main__':
+    unittest.main()